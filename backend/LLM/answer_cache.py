@@ -0,0 +1,173 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from backend.LLM.config import ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+# Neighbours checked per lookup; the nearest one may belong to another index version or be expired
+_SEARCH_NEIGHBOURS = 8
+
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and strip trailing punctuation so trivial variants share a key"""
+    text = _WHITESPACE.sub(" ", (question or "").strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed on the embedding of the normalized standalone question.
+
+    Vectors live in a small inner-product FAISS index (cosine on normalized vectors) next to the
+    document index. Entries expire after ttl_seconds and the least recently used entry is evicted
+    once max_entries is reached. Exact normalized matches are served without embedding at all.
+    Entries are scoped to the document index version they were answered from, so an answer
+    stored by a request still running on a retired index is never served against the new one.
+    """
+
+    def __init__(self, embedding_model, similarity_threshold=ANSWER_CACHE_SIMILARITY,
+                 ttl_seconds=ANSWER_CACHE_TTL_SECONDS, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._index = None  # created lazily once the embedding dimension is known
+        self._entries = OrderedDict()  # id -> entry dict, ordered by recency
+        self._by_text = {}  # normalized question -> id
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.saved_latency_seconds = 0.0
+
+    def _embed(self, normalized):
+        vector = np.asarray(self.embedding_model.embed_query(normalized), dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._by_text.pop(entry["key"], None)
+        self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+
+    def _expired(self, entry, now):
+        return now - entry["created_at"] > self.ttl_seconds
+
+    def _hit(self, entry_id, entry, started):
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        self.saved_latency_seconds += max(0.0, entry["latency"] - (time.perf_counter() - started))
+        return {"answer": entry["answer"], "sources": list(entry["sources"])}
+
+    def record_bypass(self):
+        """Count a request that skipped the cache because its context made a hit unsafe"""
+        with self._lock:
+            self.bypasses += 1
+
+    def lookup(self, question, index_version=None):
+        """
+        Look up a cached answer for a standalone question, among answers from index_version.
+
+        Returns:
+            (hit, vector): hit is {"answer", "sources"} or None; vector is the query embedding
+            (None on an exact-text hit) and can be passed back to store() to avoid re-embedding.
+        """
+        started = time.perf_counter()
+        key = normalize_question(question)
+        now = time.time()
+
+        with self._lock:
+            entry_id = self._by_text.get((index_version, key))
+            if entry_id is not None:
+                entry = self._entries[entry_id]
+                if not self._expired(entry, now):
+                    return self._hit(entry_id, entry, started), None
+                self._remove(entry_id)
+
+        vector = self._embed(key)
+
+        with self._lock:
+            if self._index is not None and self._index.ntotal > 0:
+                scores, ids = self._index.search(vector, min(_SEARCH_NEIGHBOURS, self._index.ntotal))
+                for score, entry_id in zip(scores[0].tolist(), ids[0].tolist()):
+                    # Results come best first: nothing after a score below the threshold can match
+                    if entry_id < 0 or score < self.similarity_threshold:
+                        break
+                    entry = self._entries.get(entry_id)
+                    if entry is None or entry["index_version"] != index_version:
+                        continue
+                    if self._expired(entry, now):
+                        self._remove(entry_id)
+                        continue
+                    logger.debug(f"Answer cache hit (similarity={score:.3f}) for: {question}")
+                    return self._hit(entry_id, entry, started), vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, question, answer, sources, latency, vector=None, index_version=None):
+        """Cache an answer produced by the full pipeline in `latency` seconds, from index_version"""
+        if not answer:
+            return
+        key = normalize_question(question)
+        if vector is None:
+            vector = self._embed(key)
+
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            if (index_version, key) in self._by_text:
+                self._remove(self._by_text[(index_version, key)])
+            while len(self._entries) >= self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "key": (index_version, key),
+                "index_version": index_version,
+                "answer": answer,
+                "sources": list(sources),
+                "latency": latency,
+                "created_at": time.time(),
+            }
+            self._by_text[(index_version, key)] = entry_id
+
+    def clear(self):
+        """Drop every cached answer (e.g. after the document index changes)"""
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._entries.clear()
+            self._by_text.clear()
+
+    def stats(self):
+        """Hit rate and saved latency, for the metrics endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_latency_seconds": round(self.saved_latency_seconds, 3),
+            }
@@ -0,0 +1,177 @@
+"""
+Offline latency / recall benchmark for the RAG chat path.
+
+Runs every stage of a chat turn explicitly against the real index and embedding model, with a
+deterministic fake LLM so no API key or network is needed:
+
+    python -m backend.LLM.benchmark --output bench.json --repeat 3
+
+Results (per-stage p50/p95/p99, recall@k on the questions labeled with relevant_sources, index
+memory footprint and the index/chunking configuration) are written as JSON so runs can be compared. "total" covers the chat path stages only; "embed" and
+"search" break "retrieve" down and are timed in a separate pass, so nothing is counted twice.
+"""
+
+import argparse
+import json
+import os
+import resource
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from backend.LLM.components import RetrievalComponents
+from backend.LLM.config import MAX_INPUT_TOKENS, MAX_CONTEXT_TOKENS, model_name
+from backend.LLM.docstore import DOCSTORE_NAME
+from backend.LLM.bm25 import BM25_NAME
+from backend.LLM.faiss_indexing import load_index_meta
+from backend.LLM.index_manifest import load_manifest
+from backend.LLM.llm_provider import create_chat_model
+from backend.LLM.qa import CONTEXTUALIZE_Q_PROMPT, QA_PROMPT
+from backend.LLM.tokens import count_tokens, enforce_token_limit, trim_documents_to_budget
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+QUESTIONS_PATH = Path(__file__).resolve().parent / "data" / "benchmark_questions.json"
+PATH_STAGES = ("tokenize", "rewrite", "retrieve", "prompt_build", "generate")
+BREAKDOWN_STAGES = ("embed", "search")
+STAGES = PATH_STAGES + BREAKDOWN_STAGES + ("total",)
+
+
+def _timed(timings, stage, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[stage].append((time.perf_counter() - started) * 1000.0)
+    return result
+
+
+def _tokenize(question):
+    """Input budgeting as done by chat(), plus a full count"""
+    question = enforce_token_limit(question, model_name=model_name, max_tokens=MAX_INPUT_TOKENS)
+    count_tokens(question)
+    return question
+
+
+def _percentiles(samples_ms):
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def _source_name(doc):
+    metadata = getattr(doc, "metadata", {})
+    return os.path.basename(metadata.get("source") or metadata.get("file_name") or "unknown")
+
+
+def _memory_footprint(components):
+    """Bytes held by the vector index plus on-disk sizes of the other index artifacts"""
+    index_dir = components.index_path
+    files = {name: (index_dir / name).stat().st_size
+             for name in ("index.faiss", DOCSTORE_NAME, BM25_NAME, "index.pkl") if (index_dir / name).exists()}
+    return {
+        "faiss_index_bytes": int(faiss.serialize_index(components.faiss_index.index).size),
+        "files_bytes": files,
+        # ru_maxrss is KiB on Linux
+        "process_max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def run_benchmark(components, questions, k, repeat=1, use_embedding_cache=False):
+    fake_llm = create_chat_model(model_name, provider="fake", fallback=None)
+    # The retriever embeds through the query cache too; unless asked, it is emptied before every
+    # timed step so "retrieve" and "embed" both measure the model rather than a dict lookup
+    embedder = components.embedding_model
+    reset_cache = (lambda: None) if use_embedding_cache else embedder.clear
+    faiss_index = components.faiss_index
+    retriever = components.retriever
+
+    timings = {stage: [] for stage in STAGES}
+    recalls = []
+    for _ in range(repeat):
+        for item in questions:
+            question = item["question"]
+            path_start = {stage: len(timings[stage]) for stage in PATH_STAGES}
+
+            question = _timed(timings, "tokenize", _tokenize, question)
+            _timed(timings, "rewrite", lambda: fake_llm.invoke(
+                CONTEXTUALIZE_Q_PROMPT.format_messages(chat_history=[], input=question)
+            ))
+            reset_cache()
+            documents = _timed(timings, "retrieve", retriever.invoke, question)
+            messages = _timed(timings, "prompt_build", lambda: QA_PROMPT.format_messages(
+                context="\n\n".join(doc.page_content for doc in
+                                    trim_documents_to_budget(documents, MAX_CONTEXT_TOKENS, model_name)),
+                chat_history=[],
+                input=question,
+            ))
+            _timed(timings, "generate", fake_llm.invoke, messages)
+            timings["total"].append(sum(timings[stage][path_start[stage]] for stage in PATH_STAGES))
+
+            relevant = set(item.get("relevant_sources") or [])
+            if relevant:
+                retrieved = {_source_name(doc) for doc in documents[:k]}
+                recalls.append(len(relevant & retrieved) / len(relevant))
+
+            # Breakdown of "retrieve", outside the chat path and its total
+            reset_cache()
+            vector = _timed(timings, "embed", embedder.embed_query, question)
+            _timed(timings, "search", faiss_index.similarity_search_by_vector, vector, k=k)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "k": k,
+            "repeat": repeat,
+            "questions": len(questions),
+            "embedding_cache": use_embedding_cache,
+            "retriever": type(retriever).__name__,
+            "llm": {"provider": "fake", "latency_median_ms": fake_llm.latency_median_ms,
+                    "token_delay_ms": fake_llm.token_delay_ms},
+            "index": load_index_meta(components.index_path),
+            "chunking": (load_manifest(components.index_path) or {}).get("chunking"),
+        },
+        "stages": {stage: _percentiles(samples) for stage, samples in timings.items() if samples},
+        "recall_at_k": round(float(np.mean(recalls)), 4) if recalls else None,
+        "labeled_questions": sum(1 for item in questions if item.get("relevant_sources")),
+        "memory": _memory_footprint(components),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RAG chat path offline.")
+    parser.add_argument("--questions", default=str(QUESTIONS_PATH), help="JSON list of {question, relevant_sources}.")
+    parser.add_argument("--output", default="rag_benchmark.json", help="Where to write the JSON results.")
+    parser.add_argument("--k", type=int, default=3, help="Documents retrieved per question.")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set.")
+    parser.add_argument("--embedding-cache", action="store_true", help="Measure with the query embedding cache on.")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    components = RetrievalComponents(k=args.k)
+    if components.faiss_index is None:
+        logger.error("FAISS index could not be loaded. Exiting.")
+        return
+
+    results = run_benchmark(components, questions, k=args.k, repeat=args.repeat,
+                            use_embedding_cache=args.embedding_cache)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for stage, stats in results["stages"].items():
+        logger.info(f"{stage:>12}: p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms")
+    logger.info(f"recall@{args.k}: {results['recall_at_k']} over {results['labeled_questions']} labeled questions")
+    logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+BM25_NAME = "bm25.npz"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its of on or should that the "
+    "this to was what when which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    """Lowercased alphanumeric terms without stopwords"""
+    return [term for term in _TOKEN.findall(text.lower()) if term not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the chunks of the FAISS docstore.
+
+    Postings are stored CSR-style (one offsets array into flat doc/tf arrays) so the index saves
+    to a single .npz without pickle and scoring is a few vectorized numpy ops per query term.
+    """
+
+    def __init__(self, doc_ids, terms, offsets, postings_docs, postings_tf, doc_len, k1=1.5, b=0.75):
+        self.doc_ids = doc_ids
+        self.terms = {term: row for row, term in enumerate(terms)}
+        self._terms_array = terms
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, texts, doc_ids):
+        postings = {}
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for row, term in enumerate(terms):
+            offsets[row + 1] = offsets[row] + len(postings[term])
+        postings_docs = np.empty(offsets[-1], dtype=np.int32)
+        postings_tf = np.empty(offsets[-1], dtype=np.float32)
+        for row, term in enumerate(terms):
+            docs, tfs = zip(*postings[term])
+            postings_docs[offsets[row]:offsets[row + 1]] = docs
+            postings_tf[offsets[row]:offsets[row + 1]] = tfs
+
+        logger.info(f"BM25 index built: {len(texts)} chunks, {len(terms)} terms.")
+        return cls(np.array(doc_ids), np.array(terms), offsets, postings_docs, postings_tf, doc_len)
+
+    @classmethod
+    def from_faiss_index(cls, faiss_index):
+        """Index every document in a LangChain FAISS store, keyed by its docstore id"""
+        doc_ids, texts = [], []
+        for position in sorted(faiss_index.index_to_docstore_id):
+            doc_id = faiss_index.index_to_docstore_id[position]
+            doc = faiss_index.docstore.search(doc_id)
+            doc_ids.append(doc_id)
+            texts.append(getattr(doc, "page_content", ""))
+        return cls.build(texts, doc_ids)
+
+    def save(self, index_dir):
+        path = Path(index_dir) / BM25_NAME
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path, doc_ids=self.doc_ids, terms=self._terms_array, offsets=self.offsets,
+            postings_docs=self.postings_docs, postings_tf=self.postings_tf, doc_len=self.doc_len,
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"BM25 index saved to {path}.")
+
+    @classmethod
+    def load(cls, index_dir):
+        """Load bm25.npz from index_dir, or None if it does not exist"""
+        path = Path(index_dir) / BM25_NAME
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["doc_ids"], data["terms"], data["offsets"], data["postings_docs"],
+                       data["postings_tf"], data["doc_len"])
+
+    def search(self, query, k):
+        """
+        Score all chunks against the query.
+
+        Returns:
+            (results, coverage): results is [(docstore id, score)] best first; coverage is the
+            fraction of query terms present in the index
+        """
+        query_terms = tokenize(query)
+        # An empty corpus, or one whose chunks are all empty, has avgdl 0 and nothing to match
+        if not query_terms or not len(self.doc_len) or self.avgdl <= 0:
+            return [], 0.0
+
+        n_docs = len(self.doc_len)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        known = 0
+        for term in query_terms:
+            row = self.terms.get(term)
+            if row is None:
+                continue
+            known += 1
+            start, end = self.offsets[row], self.offsets[row + 1]
+            docs, tf = self.postings_docs[start:end], self.postings_tf[start:end]
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        k = min(k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = [(str(self.doc_ids[doc]), float(scores[doc])) for doc in top if scores[doc] > 0]
+        return results, known / len(query_terms)
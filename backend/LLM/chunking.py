@@ -1,4 +1,7 @@
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+from backend.LLM.config import CHUNK_SIZE, CHUNK_OVERLAP
+from backend.LLM.dedup import ChunkDeduplicator
+from backend.LLM.tokens import token_length_function
 from backend.src.utils.logger import get_logger
 
 #Initialize logger
@@ -6,7 +9,14 @@ logger=get_logger(__name__)
 
 #Function for chunking documents
 
-def chunk_documents(documents, chunk_size=500, chunk_overlap=50):
+def chunk_documents(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, length_function=None,
+                    deduplicate=False):
+    """
+    Split documents into chunks of at most chunk_size tokens (or length_function units).
+
+    Exact duplicate chunks within the given documents are dropped when deduplicate is set.
+    Index builds leave this off: ingestion deduplicates per file with CHUNK_DEDUP.
+    """
 
     if not isinstance(documents,list):
         logger.error("Input documents should be a list of Document objects.")
@@ -21,8 +31,7 @@ def chunk_documents(documents, chunk_size=500, chunk_overlap=50):
     text_splitter=RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        length_function=len #For characters
-        #TODO use tokenizer-based length function later
+        length_function=length_function or token_length_function() #Tokens, via the cached tiktoken encoder
     )
 
     try:
@@ -30,4 +39,7 @@ def chunk_documents(documents, chunk_size=500, chunk_overlap=50):
     except Exception as e:
         logger.error(f"Error during chunking: {e}")
         return []
+
+    if deduplicate:
+        chunks, _ = ChunkDeduplicator(mode="exact").filter(chunks)
     return chunks
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from backend.config import chunking_model_name
+from backend.LLM.bm25 import BM25Index
+from backend.LLM.config import RETRIEVER_K, HYBRID_RETRIEVAL
+from backend.LLM.faiss_indexing import DATA_DIR, create_embedding_model, build_faiss_index, load_faiss_index
+from backend.LLM.hybrid_retriever import HybridRetriever
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class RetrievalComponents:
+    """
+    Owns the single embedding model, FAISS index and retriever shared by every consumer.
+
+    The sentence-transformer weights are loaded once, on first use, and reused by both QA chains,
+    the answer cache and the indexing script.
+    """
+
+    def __init__(self, model_name=chunking_model_name, index_path=DATA_DIR, k=RETRIEVER_K, embedding_options=None,
+                 writable=False, embedding_model=None):
+        self.model_name = model_name
+        self.index_path = Path(index_path)
+        self.k = k
+        # Serving maps the index read-only; the indexing script needs an in-memory, writable copy
+        self.writable = writable
+        # Extra create_embedding_model() arguments (batch_size, num_threads, multi_process)
+        self.embedding_options = embedding_options or {}
+        # An already-loaded model can be passed in, e.g. to load a second index without reloading it
+        self._embedding_model = embedding_model
+        self._faiss_index = None
+        self._retriever = None
+
+    @property
+    def embedding_model(self):
+        if self._embedding_model is None:
+            logger.info(f"Loading embedding model {self.model_name}...")
+            self._embedding_model = create_embedding_model(self.model_name, **self.embedding_options)
+        return self._embedding_model
+
+    @property
+    def faiss_index(self):
+        if self._faiss_index is None:
+            self._faiss_index = load_faiss_index(
+                self.index_path, embedding_model=self.embedding_model, writable=self.writable
+            )
+        return self._faiss_index
+
+    @property
+    def retriever(self):
+        if self._retriever is None and self.faiss_index is not None:
+            lexical_index = BM25Index.load(self.index_path) if HYBRID_RETRIEVAL else None
+            if lexical_index is not None:
+                logger.info("Using hybrid BM25 + dense retriever.")
+                self._retriever = HybridRetriever(vector_store=self.faiss_index, lexical_index=lexical_index, k=self.k)
+            else:
+                self._retriever = self.faiss_index.as_retriever(search_kwargs={"k": self.k})
+        return self._retriever
+
+    def build_index(self, chunks, ids=None, index_type="Flat"):
+        """Build a new index from chunks with the shared embedding model and make it the active one"""
+        faiss_index = build_faiss_index(chunks, embedding_model=self.embedding_model, ids=ids, index_type=index_type)
+        if faiss_index is not None:
+            self._faiss_index = faiss_index
+            self._retriever = None
+        return faiss_index
+
+    def close_embedding_model(self):
+        """Release the embedding model's worker processes (multi_process), if it was loaded"""
+        close = getattr(self._embedding_model, "close", None)
+        if close is not None:
+            close()
+
+
+_shared_components = None
+
+
+def get_shared_components():
+    """Returns the process-wide RetrievalComponents, creating it on first call."""
+    global _shared_components
+    if _shared_components is None:
+        _shared_components = RetrievalComponents()
+    return _shared_components
@@ -1,9 +1,81 @@
 
+import os
+
 #Model choice
 
 model_name="gpt-4o-mini"
 chunking_model_name="sentence-transformers/all-MiniLM-L6-v2"
 
+#LLM provider
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")  # "openai", or "fake" for offline load tests and benchmarks
+LLM_FALLBACK_PROVIDER = os.getenv("LLM_FALLBACK_PROVIDER") or None  # e.g. "fake" to degrade instead of failing when the provider is down
+FAKE_LLM_RESPONSES = [  # reply templates; {input} is replaced by the last user message
+    "I can't reach the language model right now, so here is general guidance: sauna bathing is generally "
+    "safe for healthy adults. Keep sessions to 15-20 minutes, stay hydrated and leave if you feel unwell.",
+]
+FAKE_LLM_LATENCY_MEDIAN_MS = float(os.getenv("FAKE_LLM_LATENCY_MEDIAN_MS", "0"))  # time to first token
+FAKE_LLM_LATENCY_SIGMA = 0.5  # log-normal spread of the time to first token
+FAKE_LLM_TOKEN_DELAY_MS = float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "0"))  # between streamed tokens
+FAKE_LLM_SEED = 0
+
 #Token limits
 
-MAX_INPUT_TOKENS = 3000
\ No newline at end of file
+MAX_INPUT_TOKENS = 3000
+MAX_HISTORY_TOKENS = 2000  # chat history passed to the rewrite and answer prompts
+MAX_CONTEXT_TOKENS = 1500  # retrieved documents stuffed into the answer prompt
+FALLBACK_ENCODING = "cl100k_base"  # used when tiktoken does not know the model name
+
+#Semantic answer cache
+
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_SIMILARITY = 0.92  # cosine similarity needed to reuse a cached answer
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANSWER_CACHE_MAX_ENTRIES = 1000
+
+#Query embedding cache
+
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_PATH = None  # set to an .npz path (e.g. "backend/LLM/data/query_embedding_cache.npz") to persist across restarts
+
+#Retrieval
+
+RETRIEVER_K = 3
+HYBRID_RETRIEVAL = True  # fuse BM25 with dense search when bm25.npz exists beside the index
+HYBRID_FETCH_K = 10  # candidates taken from each retriever before fusion
+RRF_K = 60  # reciprocal-rank fusion constant
+LEXICAL_FAST_PATH_MIN_SCORE = 8.0  # BM25 score needed to skip dense search...
+LEXICAL_FAST_PATH_MARGIN = 1.5  # ...when the best hit also beats the runner-up by this factor
+
+#Request coalescing
+
+COALESCE_REQUESTS = True  # share one pipeline run between concurrent identical first-turn questions
+
+#Index building
+
+CHUNK_SIZE = 200  # tokens
+CHUNK_OVERLAP = 20  # tokens
+CHUNK_DEDUP = "minhash"  # "minhash" (exact + near-duplicates), "exact", or None
+MINHASH_THRESHOLD = 0.9  # estimated Jaccard similarity above which a chunk counts as a near-duplicate
+INDEX_BATCH_SIZE = 256  # chunks handed to the embedding model per batch
+EMBEDDING_BATCH_SIZE = 64  # sentence-transformers encode() batch size
+EMBEDDING_THREADS = None  # torch intra-op threads for embedding; None keeps the torch default
+EMBEDDING_WORKERS = None  # CPU processes for multi-process embedding; None uses min(cores, 4)
+EMBEDDING_NORMALIZE = False  # must match between index build and query time
+INGEST_WORKERS = None  # PDF parsing processes; None uses every core
+
+#FAISS index type
+
+FAISS_INDEX_TYPE = "Flat"  # "Flat", "ivf_flat", "hnsw", "ivf_pq" or any faiss.index_factory string
+FAISS_NPROBE = 8  # IVF lists probed per query (recall vs latency)
+FAISS_EF_SEARCH = 64  # HNSW search breadth (recall vs latency)
+FAISS_TRAIN_SAMPLE_SIZE = 20000  # vectors sampled to train IVF/PQ
+
+#Index storage
+
+ALLOW_LEGACY_PICKLE_INDEX = False  # serve index.pkl docstores directly (unpickling on every load)
+MIGRATE_LEGACY_INDEX = True  # convert an index.pkl to the pickle-free format on first load (unpickles it once)
+
+#Index hot-swap
+
+INDEX_SWAP_DRAIN_TIMEOUT_SECONDS = 60  # wait this long for requests on the old index before releasing it anyway
@@ -0,0 +1,109 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from backend.LLM.config import CHUNK_DEDUP, MINHASH_THRESHOLD
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _normalize(text):
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+
+def content_hash(text):
+    """Hash of the case- and whitespace-normalized chunk text"""
+    return hashlib.sha1(_normalize(text).encode("utf-8")).hexdigest()
+
+
+class ChunkDeduplicator:
+    """
+    Drops duplicate chunks before they are embedded.
+
+    mode None keeps every chunk. Otherwise exact duplicates (after normalization) are removed,
+    and in "minhash" mode near-duplicates whose estimated word-shingle Jaccard similarity is at
+    least `threshold` are removed as well, using banded LSH so each chunk is only compared
+    against likely candidates.
+    State is kept across calls until reset(); the drop counters are kept across resets.
+    """
+
+    def __init__(self, mode=CHUNK_DEDUP, threshold=MINHASH_THRESHOLD, num_perm=64, bands=16,
+                 shingle_size=5, seed=1):
+        self.mode = mode
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+        self.dropped_exact = 0
+        self.dropped_near = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the chunks seen so far"""
+        self._seen_hashes = set()
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+
+    def _signature(self, text):
+        words = _normalize(text).split(" ")
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+        # (a * h + b) mod p for every permutation and shingle; uint64 wrap-around is part of the hash
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _is_near_duplicate(self, signature):
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(buckets.get(key, ()))
+        for candidate in candidates:
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                return True
+
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            buckets.setdefault(key, []).append(position)
+        return False
+
+    def keep(self, text):
+        """Return True if text is new, recording it; False if it duplicates an earlier chunk"""
+        if not self.mode:
+            return True
+
+        digest = content_hash(text)
+        if digest in self._seen_hashes:
+            self.dropped_exact += 1
+            return False
+        self._seen_hashes.add(digest)
+
+        if self.mode == "minhash" and text.strip() and self._is_near_duplicate(self._signature(text)):
+            self.dropped_near += 1
+            return False
+        return True
+
+    def filter(self, chunks, ids=None):
+        """Filter chunks (and their parallel ids). Returns (kept chunks, kept ids)."""
+        ids = ids if ids is not None else [None] * len(chunks)
+        kept_chunks, kept_ids = [], []
+        for chunk, chunk_id in zip(chunks, ids):
+            if self.keep(chunk.page_content):
+                kept_chunks.append(chunk)
+                kept_ids.append(chunk_id)
+        return kept_chunks, kept_ids
@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+DOCSTORE_NAME = "docstore.sqlite"
+
+_SCHEMA = """
+CREATE TABLE docs (
+    position INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+)
+"""
+
+
+class _ReadOnlyConnection:
+    """One immutable SQLite connection shared by threads; reads are serialized by a lock"""
+
+    def __init__(self, path):
+        uri = f"{Path(path).resolve().as_uri()}?mode=ro&immutable=1"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def fetchone(self, query, params=()):
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def fetchall(self, query, params=()):
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore backed by docstore.sqlite.
+
+    Documents are read by id on demand, so the process heap never holds the corpus and every
+    worker shares the same OS page cache.
+    """
+
+    def __init__(self, connection):
+        self._conn = connection
+
+    def search(self, search):
+        row = self._conn.fetchone("SELECT page_content, metadata FROM docs WHERE id = ?", (search,))
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]), id=search)
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteIndexToDocstoreId(Mapping):
+    """Lazy FAISS position -> docstore id mapping, read from the same SQLite file"""
+
+    def __init__(self, connection):
+        self._conn = connection
+        self._len = connection.fetchone("SELECT COUNT(*) FROM docs")[0]
+
+    def __getitem__(self, position):
+        row = self._conn.fetchone("SELECT id FROM docs WHERE position = ?", (int(position),))
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return (row[0] for row in self._conn.fetchall("SELECT position FROM docs ORDER BY position"))
+
+
+def open_docstore(index_dir):
+    """Open docstore.sqlite read-only. Returns (docstore, index_to_docstore_id)."""
+    connection = _ReadOnlyConnection(Path(index_dir) / DOCSTORE_NAME)
+    return SQLiteDocstore(connection), SQLiteIndexToDocstoreId(connection)
+
+
+def read_docstore(index_dir):
+    """Load docstore.sqlite fully into memory, for writable (indexing) use. Returns (docs by id, mapping)."""
+    connection = _ReadOnlyConnection(Path(index_dir) / DOCSTORE_NAME)
+    documents = {}
+    index_to_docstore_id = {}
+    for position, doc_id, page_content, metadata in connection.fetchall(
+            "SELECT position, id, page_content, metadata FROM docs ORDER BY position"):
+        documents[doc_id] = Document(page_content=page_content, metadata=json.loads(metadata), id=doc_id)
+        index_to_docstore_id[position] = doc_id
+    return documents, index_to_docstore_id
+
+
+def write_docstore(index_dir, docstore, index_to_docstore_id):
+    """Write every mapped document to docstore.sqlite, replacing the old file atomically"""
+    path = Path(index_dir) / DOCSTORE_NAME
+    tmp_path = path.with_suffix(".sqlite.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(_SCHEMA)
+        rows = []
+        for position, doc_id in index_to_docstore_id.items():
+            doc = docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Document {doc_id} missing from docstore.")
+            rows.append((int(position), doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+        conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    logger.info(f"Docstore with {len(rows)} documents written to {path}.")
@@ -0,0 +1,202 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _text_key(text):
+    """Hash of the whitespace-normalized text; whitespace-only variants embed identically"""
+    normalized = _WHITESPACE.sub(" ", text.strip())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LRU cache in front of an embedding model for query embeddings.
+
+    Keyed by a hash of the query text and bounded to max_size vectors. When persist_path is set
+    the cache is loaded from and saved to a .npz file so it survives restarts. Document embedding
+    (index builds) is passed straight through, since those texts are embedded once.
+    """
+
+    def __init__(self, embedding_model, max_size=4096, persist_path=None):
+        self.embedding_model = embedding_model
+        self.max_size = max_size
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self._cache = OrderedDict()  # key -> list[float]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.persist_path is not None:
+            self.load()
+
+    def embed_query(self, text):
+        key = _text_key(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        vector = self.embedding_model.embed_query(text)
+
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts):
+        return self.embedding_model.embed_documents(texts)
+
+    def clear(self):
+        """Drop every cached vector (the persisted file, if any, is left alone until the next save)"""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Release the wrapped model's resources (e.g. a multi-process pool), if it holds any"""
+        close = getattr(self.embedding_model, "close", None)
+        if close is not None:
+            close()
+
+    def load(self):
+        """Load persisted vectors, if the cache file exists"""
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                keys, vectors = data["keys"], data["vectors"]
+            with self._lock:
+                for key, vector in zip(keys[-self.max_size:], vectors[-self.max_size:]):
+                    self._cache[str(key)] = vector.tolist()
+            logger.info(f"Loaded {len(self._cache)} cached query embeddings from {self.persist_path}.")
+        except Exception as e:
+            logger.error(f"Error loading embedding cache: {e}")
+
+    def save(self):
+        """Persist the cache in LRU order (oldest first) so a reload keeps the same eviction order"""
+        if self.persist_path is None:
+            return
+        with self._lock:
+            if not self._cache:
+                return
+            keys = np.array(list(self._cache.keys()))
+            vectors = np.array(list(self._cache.values()), dtype=np.float32)
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(".tmp.npz")
+            np.savez(tmp_path, keys=keys, vectors=vectors)
+            os.replace(tmp_path, self.persist_path)
+            logger.info(f"Saved {len(keys)} cached query embeddings to {self.persist_path}.")
+        except Exception as e:
+            logger.error(f"Error saving embedding cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_DEFAULT_CPU_WORKERS = 4
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+@contextmanager
+def _thread_env(threads):
+    """Set the BLAS / OpenMP thread count for child processes started inside the block"""
+    previous = {name: os.environ.get(name) for name in _THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in _THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class MultiProcessEmbeddings(Embeddings):
+    """
+    sentence-transformers embeddings that shard embed_documents across a process pool.
+
+    The pool is started on the first document batch and kept until close(), so an index build
+    starts it once instead of once per batch. Every encode gets the same batch_size and
+    normalize_embeddings as the single-process path, so the vectors match. Queries are encoded
+    in-process. On CPU the pool has `workers` processes (default min(cores, 4)) and each one gets
+    cores // workers torch threads, so the pool never runs more threads than there are cores.
+    """
+
+    def __init__(self, model_name, batch_size=32, normalize_embeddings=False, workers=None):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.normalize_embeddings = normalize_embeddings
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                import torch
+
+                if torch.cuda.is_available():
+                    # One worker per GPU
+                    self._pool = self.model.start_multi_process_pool()
+                else:
+                    cores = os.cpu_count() or 1
+                    workers = max(1, min(self.workers or _DEFAULT_CPU_WORKERS, cores))
+                    # Workers are spawned and read the thread count from the environment when they
+                    # import torch; torch.set_num_threads() here would not reach them
+                    with _thread_env(max(1, cores // workers)):
+                        self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * workers)
+                logger.info(f"Started embedding process pool with {len(self._pool['processes'])} workers.")
+            return self._pool
+
+    def embed_documents(self, texts):
+        # Same preprocessing as HuggingFaceEmbeddings
+        texts = [text.replace("\n", " ") for text in texts]
+        vectors = self.model.encode_multi_process(
+            texts, self._get_pool(), batch_size=self.batch_size, normalize_embeddings=self.normalize_embeddings
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        vector = self.model.encode(
+            [text.replace("\n", " ")], batch_size=self.batch_size, normalize_embeddings=self.normalize_embeddings
+        )
+        return vector[0].tolist()
+
+    def close(self):
+        """Stop the process pool, if it was started"""
+        with self._lock:
+            if self._pool is not None:
+                self.model.stop_multi_process_pool(self._pool)
+                self._pool = None
@@ -1,8 +1,25 @@
+import fcntl
+import json
+import math
+import os
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from backend.src.utils.logger import get_logger
 from pathlib import Path
 from backend.config import chunking_model_name
+from backend.LLM.config import (
+    EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH, EMBEDDING_BATCH_SIZE, EMBEDDING_NORMALIZE, EMBEDDING_THREADS,
+    EMBEDDING_WORKERS, FAISS_INDEX_TYPE, FAISS_NPROBE, FAISS_EF_SEARCH, FAISS_TRAIN_SAMPLE_SIZE,
+    ALLOW_LEGACY_PICKLE_INDEX, MIGRATE_LEGACY_INDEX
+)
+from backend.LLM.bm25 import BM25Index
+from backend.LLM.docstore import DOCSTORE_NAME, open_docstore, read_docstore, write_docstore
+from backend.LLM.embeddings import CachedEmbeddings, MultiProcessEmbeddings
 
 #TODO use custom embeddings later
 
@@ -11,16 +28,167 @@ logger = get_logger(__name__)
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent  # adjust if inside src/
 DATA_DIR = PROJECT_ROOT / "backend" / "LLM" / "data" / "faiss_index"
-def build_faiss_index(chunks,model_name=chunking_model_name):
+INDEX_META_NAME = "index_meta.json"
+LEGACY_DOCSTORE_NAME = "index.pkl"
+MIGRATION_LOCK_NAME = "migrate.lock"
+
+# Named presets; anything else is passed to faiss.index_factory as-is.
+# {nlist} is derived from the corpus size at build time.
+INDEX_PRESETS = {
+    "flat": "Flat",
+    "ivf_flat": "IVF{nlist},Flat",
+    "hnsw": "HNSW32",
+    "ivf_pq": "IVF{nlist},PQ{pq_m}",
+}
+
+# faiss wants roughly this many training points per centroid
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def create_embedding_model(model_name=chunking_model_name, cache_size=EMBEDDING_CACHE_SIZE,
+                           cache_path=EMBEDDING_CACHE_PATH, batch_size=EMBEDDING_BATCH_SIZE,
+                           num_threads=EMBEDDING_THREADS, multi_process=False, workers=EMBEDDING_WORKERS):
+    """
+    Load the sentence-transformer once, behind the query embedding cache.
+
+    batch_size, num_threads, multi_process and workers only change how fast documents are embedded, never
+    the vectors themselves. Normalization is fixed by EMBEDDING_NORMALIZE so that index builds and
+    query-time embeddings always agree.
+    """
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+
+    if multi_process:
+        # Shards embed_documents across `workers` sentence-transformers processes; the pool lives
+        # until close(), so callers building an index must close the model when done
+        embedding_model = MultiProcessEmbeddings(
+            model_name, batch_size=batch_size, normalize_embeddings=EMBEDDING_NORMALIZE, workers=workers
+        )
+    else:
+        embedding_model = HuggingFaceEmbeddings(
+            model_name=model_name,
+            encode_kwargs={"batch_size": batch_size, "normalize_embeddings": EMBEDDING_NORMALIZE},
+        )
+    # Queries go through an LRU cache so repeated questions skip the sentence-transformer pass
+    return CachedEmbeddings(
+        embedding_model,
+        max_size=cache_size,
+        persist_path=cache_path,
+    )
+
+
+def resolve_index_factory(index_type, ntotal, dim):
+    """
+    Turn a preset name or factory string into a concrete faiss.index_factory string.
+
+    Returns "Flat" when the corpus is too small to train the requested index.
+    """
+    factory = INDEX_PRESETS.get(index_type.lower(), index_type)
+    if factory == "Flat":
+        return factory
+
+    nlist = min(int(4 * math.sqrt(ntotal)), ntotal // _MIN_POINTS_PER_CENTROID)
+    if "{nlist}" in factory and nlist < 1:
+        logger.warning(f"Only {ntotal} vectors; too few to train '{factory}'. Using a flat index.")
+        return "Flat"
+    # PQ sub-quantizers must divide the dimension; 8 bytes per vector minimum
+    pq_m = next((m for m in (48, 32, 24, 16, 12, 8) if dim % m == 0 and m <= dim // 4), 8)
+    if "PQ" in factory and ntotal < 256 * _MIN_POINTS_PER_CENTROID:
+        logger.warning(f"Only {ntotal} vectors; too few to train PQ codebooks. Using IVF,Flat.")
+        factory = INDEX_PRESETS["ivf_flat"]
+    return factory.format(nlist=max(nlist, 1), pq_m=pq_m)
+
+
+def convert_faiss_index(faiss_index, index_type=FAISS_INDEX_TYPE, train_sample_size=FAISS_TRAIN_SAMPLE_SIZE):
+    """
+    Replace the flat index inside a LangChain FAISS store with an index_factory index.
+
+    Vectors are reconstructed from the flat index, so nothing is re-embedded, and the
+    position -> docstore id mapping is unchanged. Trainable indexes are trained on a random sample.
+    """
+    flat = faiss_index.index
+    ntotal, dim = flat.ntotal, flat.d
+    factory = resolve_index_factory(index_type, ntotal, dim)
+    if factory == "Flat":
+        return faiss_index
+
+    vectors = flat.reconstruct_n(0, ntotal)
+    index = faiss.index_factory(dim, factory, flat.metric_type)
+    if not index.is_trained:
+        rng = np.random.default_rng(42)
+        sample = vectors[rng.choice(ntotal, size=min(ntotal, train_sample_size), replace=False)]
+        logger.info(f"Training {factory} on {len(sample)} of {ntotal} vectors...")
+        index.train(sample)
+    index.add(vectors)
+
+    faiss_index.index = index
+    logger.info(f"Converted FAISS index to {factory}.")
+    return faiss_index
+
+
+def supports_removal(faiss_index):
+    """
+    Only flat indexes renumber positions on remove_ids the way the LangChain docstore mapping
+    expects; IVF keeps stale labels and HNSW cannot remove at all, so deletes there need a rebuild.
+    """
+    return isinstance(faiss.downcast_index(faiss_index.index), faiss.IndexFlat)
+
+
+def tune_faiss_index(faiss_index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH):
+    """Apply query-time search parameters (IVF nprobe, HNSW efSearch); no-op for flat indexes"""
+    index = faiss.downcast_index(faiss_index.index)
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None and nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        logger.info(f"FAISS nprobe set to {ivf.nprobe} (nlist={ivf.nlist}).")
+    if hasattr(index, "hnsw") and ef_search:
+        index.hnsw.efSearch = ef_search
+        logger.info(f"FAISS efSearch set to {ef_search}.")
+    return faiss_index
+
+
+def describe_faiss_index(faiss_index):
+    """Metadata recorded next to the saved index"""
+    index = faiss.downcast_index(faiss_index.index)
+    meta = {
+        "index_class": type(index).__name__,
+        "dim": index.d,
+        "ntotal": index.ntotal,
+        "metric": "inner_product" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2",
+    }
+    try:
+        meta["nlist"] = faiss.extract_index_ivf(index).nlist
+    except RuntimeError:
+        pass
+    return meta
+
+
+def load_index_meta(path=DATA_DIR):
+    """Read index_meta.json, or an empty dict for indexes saved before it existed"""
+    meta_path = Path(path) / INDEX_META_NAME
+    if not meta_path.exists():
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_faiss_index(chunks, model_name=chunking_model_name, embedding_model=None, ids=None, index_type="Flat"):
 
     if not chunks:
         logger.error("No chunks provided to build the FAISS index.")
         return None
 
-    embedding_model = HuggingFaceEmbeddings(model_name=model_name)
+    if embedding_model is None:
+        embedding_model = create_embedding_model(model_name)
 
     try:
-        faiss_index = FAISS.from_documents(chunks, embedding_model)
+        faiss_index = FAISS.from_documents(chunks, embedding_model, ids=ids)
+        if index_type != "Flat":
+            convert_faiss_index(faiss_index, index_type)
         logger.info("FAISS index built successfully.")
     except Exception as e:
         logger.error(f"Error building FAISS index: {e}")
@@ -28,33 +196,153 @@ def build_faiss_index(chunks,model_name=chunking_model_name):
     return faiss_index
 
 
-def save_faiss_index(faiss_index, path=Path("data")/"faiss_index"):
+def update_faiss_index(faiss_index, chunks, ids, delete_ids=None):
+    """Delete stale chunk ids and embed/append new chunks in place. Returns False on failure."""
+    try:
+        if delete_ids:
+            faiss_index.delete(list(delete_ids))
+            logger.info(f"Removed {len(delete_ids)} chunks from FAISS index.")
+        if chunks:
+            faiss_index.add_documents(chunks, ids=ids)
+            logger.info(f"Added {len(chunks)} chunks to FAISS index.")
+    except Exception as e:
+        logger.error(f"Error updating FAISS index: {e}")
+        return False
+    return True
+
+
+def _read_index_mmap(index_file):
+    """Memory-map the index read-only so workers share pages; fall back to a heap copy if unsupported"""
+    flag_names = ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP")
+    for name in flag_names:
+        flag = getattr(faiss, name, None)
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(str(index_file), flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            continue
+    logger.warning("This FAISS build cannot memory-map the index; loading it into memory.")
+    return faiss.read_index(str(index_file))
+
+
+def save_faiss_index(faiss_index, path=DATA_DIR, index_type=None):
+    """
+    Save the index as index.faiss + docstore.sqlite + index_meta.json.
 
-    if not path.parent.exists():
-        Path.mkdir(parents=True,exist_ok=True)
+    No pickle is written; a legacy index.pkl in the same directory is removed once the new
+    files are in place.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
     try:
-        faiss_index.save_local(str(path))
+        tmp_index = path / "index.faiss.tmp"
+        faiss.write_index(faiss_index.index, str(tmp_index))
+        write_docstore(path, faiss_index.docstore, faiss_index.index_to_docstore_id)
+        os.replace(tmp_index, path / "index.faiss")
+
+        meta = describe_faiss_index(faiss_index)
+        meta["index_type"] = index_type or load_index_meta(path).get("index_type", "Flat")
+        with open(path / INDEX_META_NAME, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        legacy_pickle = path / LEGACY_DOCSTORE_NAME
+        if legacy_pickle.exists():
+            legacy_pickle.unlink()
+            logger.info(f"Removed legacy {legacy_pickle.name}.")
         logger.info(f"FAISS index saved successfully at {path}.")
     except Exception as e:
         logger.error(f"Error saving FAISS index: {e}")
 
 
-def load_faiss_index(path=DATA_DIR, model_name=chunking_model_name):
+def load_faiss_index(path=DATA_DIR, model_name=chunking_model_name, embedding_model=None,
+                     nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH, writable=False,
+                     allow_legacy=ALLOW_LEGACY_PICKLE_INDEX, migrate_legacy=MIGRATE_LEGACY_INDEX):
+    """
+    Load the index for serving (writable=False) or for updates (writable=True).
+
+    Serving memory-maps index.faiss read-only and reads documents lazily from docstore.sqlite,
+    so nothing is unpickled and N workers share one copy of the pages. Writable loads read both
+    into memory so vectors and documents can be added or deleted. A legacy pickled docstore
+    (index.pkl) is converted to the pickle-free format first when migrate_legacy is set, and is
+    only loaded as-is with allow_legacy, which the migration itself passes.
+    """
     path = Path(path)
     logger.debug(f"Attempting to load FAISS index from {path}")
 
-    if not (path / "index.faiss").exists() or not (path / "index.pkl").exists():
+    index_file = path / "index.faiss"
+    has_docstore = (path / DOCSTORE_NAME).exists()
+    has_legacy = (path / LEGACY_DOCSTORE_NAME).exists()
+    if has_legacy and not has_docstore and not allow_legacy:
+        if not migrate_legacy:
+            logger.error(
+                f"Only a legacy pickled docstore ({LEGACY_DOCSTORE_NAME}) exists in {path} and unpickling is disabled. "
+                "Run `python -m backend.LLM.indexing --migrate` to convert it."
+            )
+            return None
+        logger.warning(f"Only a legacy pickled docstore ({LEGACY_DOCSTORE_NAME}) exists in {path}; migrating it once.")
+        if embedding_model is None:
+            embedding_model = create_embedding_model(model_name)
+        if not migrate_legacy_index(path, embedding_model=embedding_model):
+            logger.error("Index migration failed.")
+            return None
+        has_docstore, has_legacy = True, False
+    if not index_file.exists() or not (has_docstore or has_legacy):
         logger.error(f"FAISS index files not found in {path}.")
         return None
 
-    embedding_model = HuggingFaceEmbeddings(model_name=model_name)
+    if embedding_model is None:
+        embedding_model = create_embedding_model(model_name)
 
     try:
-        faiss_index = FAISS.load_local(str(path), embedding_model, allow_dangerous_deserialization=True)
-        logger.info(f"FAISS index loaded successfully from {path}.")
+        if has_docstore and writable:
+            documents, index_to_docstore_id = read_docstore(path)
+            faiss_index = FAISS(embedding_model, faiss.read_index(str(index_file)),
+                                InMemoryDocstore(documents), index_to_docstore_id)
+        elif has_docstore:
+            docstore, index_to_docstore_id = open_docstore(path)
+            faiss_index = FAISS(embedding_model, _read_index_mmap(index_file), docstore, index_to_docstore_id)
+        else:
+            logger.warning(
+                f"Loading legacy pickled docstore from {path}. "
+                "Run `python -m backend.LLM.indexing --migrate` to convert it."
+            )
+            faiss_index = FAISS.load_local(str(path), embedding_model, allow_dangerous_deserialization=True)
+        tune_faiss_index(faiss_index, nprobe=nprobe, ef_search=ef_search)
+        logger.info(f"FAISS index loaded successfully from {path} ({load_index_meta(path).get('index_type', 'Flat')}).")
         return faiss_index
     except Exception as e:
         logger.error(f"Error loading FAISS index: {e}")
         return None
 
 
+@contextmanager
+def _migration_lock(path):
+    """Exclusive lock on an index directory, so only one process (e.g. uvicorn worker) migrates it"""
+    with open(path / MIGRATION_LOCK_NAME, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate_legacy_index(path=DATA_DIR, embedding_model=None):
+    """
+    Rewrite a pickled (index.pkl) index in the pickle-free format, plus its BM25 index.
+
+    Returns True on success, or when another process already migrated the directory.
+    """
+    path = Path(path)
+    with _migration_lock(path):
+        if not (path / LEGACY_DOCSTORE_NAME).exists():
+            logger.info(f"No legacy {LEGACY_DOCSTORE_NAME} in {path}; nothing to migrate.")
+            return True
+        faiss_index = load_faiss_index(path, embedding_model=embedding_model, writable=True, allow_legacy=True)
+        if faiss_index is None:
+            return False
+        save_faiss_index(faiss_index, path)
+        if (path / LEGACY_DOCSTORE_NAME).exists():
+            return False
+        BM25Index.from_faiss_index(faiss_index).save(path)
+        return True
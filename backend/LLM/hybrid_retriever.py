@@ -0,0 +1,72 @@
+import hashlib
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from backend.LLM.config import (
+    RETRIEVER_K, HYBRID_FETCH_K, RRF_K, LEXICAL_FAST_PATH_MIN_SCORE, LEXICAL_FAST_PATH_MARGIN
+)
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+def _doc_key(doc):
+    """Docstore id when present (legacy pickled stores may lack it), else a content hash"""
+    return doc.id or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(ranked_lists, k=RRF_K):
+    """Fuse ranked document lists; each list contributes 1 / (k + rank) per document"""
+    scores = {}
+    docs = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + dense retrieval fused with reciprocal-rank fusion.
+
+    When the lexical result is confident (every query term is in the index and the best BM25
+    score is high and clearly ahead of the runner-up) the dense search and its
+    sentence-transformer forward pass are skipped entirely.
+    """
+
+    vector_store: Any
+    lexical_index: Any
+    k: int = RETRIEVER_K
+    fetch_k: int = HYBRID_FETCH_K
+    fast_path_min_score: float = LEXICAL_FAST_PATH_MIN_SCORE
+    fast_path_margin: float = LEXICAL_FAST_PATH_MARGIN
+
+    def _lexical_confident(self, results, coverage):
+        if not results or coverage < 1.0 or results[0][1] < self.fast_path_min_score:
+            return False
+        return len(results) == 1 or results[0][1] >= self.fast_path_margin * results[1][1]
+
+    def _lexical_documents(self, results):
+        documents = []
+        for doc_id, _ in results:
+            doc = self.vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+        return documents
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        lexical, coverage = self.lexical_index.search(query, self.fetch_k)
+        lexical_docs = self._lexical_documents(lexical)
+
+        if self._lexical_confident(lexical, coverage):
+            logger.debug(f"Lexical fast path (score={lexical[0][1]:.2f}) for: {query}")
+            return lexical_docs[:self.k]
+
+        dense_docs = self.vector_store.similarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([dense_docs, lexical_docs])[:self.k]
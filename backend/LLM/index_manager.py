@@ -0,0 +1,193 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from backend.LLM.components import RetrievalComponents
+from backend.LLM.config import INDEX_SWAP_DRAIN_TIMEOUT_SECONDS
+from backend.LLM.faiss_indexing import DATA_DIR, load_index_meta
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+class IndexVersion:
+    """One loaded index with the retriever and chains built on it, plus its in-flight request count"""
+
+    def __init__(self, version, components, qa_chain, qa_chain_streaming):
+        self.version = version
+        self.components = components
+        self.qa_chain = qa_chain
+        self.qa_chain_streaming = qa_chain_streaming
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.in_flight = 0
+        self.retired = False
+
+    @property
+    def faiss_index(self):
+        return self.components.faiss_index
+
+    def describe(self):
+        meta = load_index_meta(self.components.index_path)
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "index_path": str(self.components.index_path),
+            "index_type": meta.get("index_type"),
+            "ntotal": getattr(self.faiss_index.index, "ntotal", None),
+            "retriever": type(self.components.retriever).__name__,
+            "in_flight": self.in_flight,
+        }
+
+    def close(self):
+        """Drop the index, docstore and chains so their memory (and file handles) can be released"""
+        docstore = getattr(self.components.faiss_index, "docstore", None)
+        if hasattr(docstore, "close"):
+            docstore.close()
+        self.components = None
+        self.qa_chain = None
+        self.qa_chain_streaming = None
+
+
+class IndexManager:
+    """
+    Serves a versioned FAISS index and swaps in a new one without a restart.
+
+    Requests pin the version that is active when they start (acquire()), so a swap never changes
+    the index under a running chain. reload() loads the new index next to the old one, swaps the
+    active pointer atomically, then waits for requests still on the old version to finish before
+    releasing it. The embedding model is shared across versions and never reloaded.
+
+    Args:
+        chain_factory: callable(components) -> (qa_chain, qa_chain_streaming)
+        on_swap: optional callable(new version), called right after every swap
+    """
+
+    def __init__(self, chain_factory, index_path=DATA_DIR, drain_timeout=INDEX_SWAP_DRAIN_TIMEOUT_SECONDS,
+                 on_swap=None):
+        self.chain_factory = chain_factory
+        self.index_path = index_path
+        self.drain_timeout = drain_timeout
+        self.on_swap = on_swap
+        self._active = None
+        self._next_version = 1
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._reload_thread = None
+        self.status = "idle"
+        self.last_error = None
+        self.last_reload_seconds = None
+
+    @property
+    def active(self):
+        return self._active
+
+    def _build_version(self, components):
+        if components.faiss_index is None:
+            raise RuntimeError(f"FAISS index could not be loaded from {components.index_path}")
+        qa_chain, qa_chain_streaming = self.chain_factory(components)
+        if qa_chain is None or qa_chain_streaming is None:
+            raise RuntimeError("QA chains could not be created")
+        version = IndexVersion(self._next_version, components, qa_chain, qa_chain_streaming)
+        self._next_version += 1
+        return version
+
+    def _swap(self, version):
+        with self._lock:
+            previous, self._active = self._active, version
+            if previous is not None:
+                previous.retired = True
+        logger.info(f"Index version {version.version} is now active.")
+        if self.on_swap is not None:
+            self.on_swap(version)
+        return previous
+
+    def _drain(self, version):
+        deadline = time.monotonic() + self.drain_timeout
+        with self._lock:
+            while version.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        f"Index version {version.version} still has {version.in_flight} requests after "
+                        f"{self.drain_timeout}s; leaving it to be garbage-collected."
+                    )
+                    return
+                self._drained.wait(remaining)
+        version.close()
+        logger.info(f"Index version {version.version} drained and released.")
+
+    def load(self, components):
+        """Synchronously install the first version from already-configured components"""
+        version = self._build_version(components)
+        self._swap(version)
+        return version
+
+    @contextmanager
+    def acquire(self):
+        """Pin the active version for the duration of one request; yields None if nothing is loaded"""
+        with self._lock:
+            version = self._active
+            if version is not None:
+                version.in_flight += 1
+        try:
+            yield version
+        finally:
+            if version is not None:
+                with self._lock:
+                    version.in_flight -= 1
+                    if version.retired and not version.in_flight:
+                        self._drained.notify_all()
+
+    def reload(self, index_path=None):
+        """Load the index at index_path (default: the current one) and make it active. Blocks until drained."""
+        started = time.perf_counter()
+        self.status = "loading"
+        try:
+            settings = {"index_path": index_path or self.index_path}
+            current = self._active
+            if current is not None:
+                settings.update(
+                    model_name=current.components.model_name,
+                    k=current.components.k,
+                    embedding_model=current.components.embedding_model,
+                )
+            components = RetrievalComponents(**settings)
+            version = self._build_version(components)
+            # Touch the lazy retriever (and BM25 index) before it can see traffic
+            components.retriever
+        except Exception as e:
+            self.status = "failed"
+            self.last_error = str(e)
+            logger.error(f"Index reload failed; keeping the current version: {e}", exc_info=True)
+            return None
+
+        previous = self._swap(version)
+        self.last_reload_seconds = round(time.perf_counter() - started, 3)
+        self.last_error = None
+        self.status = "draining"
+        if previous is not None:
+            self._drain(previous)
+        self.status = "idle"
+        return version
+
+    def start_reload(self, index_path=None):
+        """Run reload() in a background thread. Returns False if a reload is already running."""
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._reload_thread = threading.Thread(
+                target=self.reload, args=(index_path,), name="index-reload", daemon=True
+            )
+            self._reload_thread.start()
+        return True
+
+    def describe(self):
+        active = self._active
+        return {
+            "active": active.describe() if active is not None else None,
+            "status": self.status,
+            "last_error": self.last_error,
+            "last_reload_seconds": self.last_reload_seconds,
+        }
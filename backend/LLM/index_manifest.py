@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+# 2: chunk ids include the file path; older manifests trigger a full rebuild
+MANIFEST_VERSION = 2
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids_for(relative_path, file_hash, count):
+    """
+    Deterministic docstore ids for the chunks of one file version.
+
+    The path is part of the id, so identical copies of a PDF under different names get distinct
+    ids and can be added or deleted independently.
+    """
+    prefix = hashlib.sha256(f"{relative_path}\0{file_hash}".encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{i}" for i in range(count)]
+
+
+def empty_manifest(model_name):
+    return {"version": MANIFEST_VERSION, "model_name": model_name, "files": {}}
+
+
+def load_manifest(index_dir):
+    """Load the manifest stored beside index.faiss, or None if missing or unreadable"""
+    path = Path(index_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading index manifest {path}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning(f"Index manifest {path} has unsupported version {manifest.get('version')}.")
+        return None
+    return manifest
+
+
+def save_manifest(manifest, index_dir):
+    """Write the manifest atomically so a crash never leaves a half-written file"""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    path = index_dir / MANIFEST_NAME
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def diff_files(manifest, current_hashes):
+    """
+    Compare the manifest against the current {file name: sha256} map.
+
+    Returns:
+        (added, changed, removed): lists of file names
+    """
+    known = manifest.get("files", {})
+    added = sorted(name for name in current_hashes if name not in known)
+    changed = sorted(name for name, digest in current_hashes.items()
+                     if name in known and known[name]["sha256"] != digest)
+    removed = sorted(name for name in known if name not in current_hashes)
+    return added, changed, removed
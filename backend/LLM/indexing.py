@@ -1,38 +1,187 @@
-from src.utils.logger import get_logger
-from src.embeddings.faiss_indexing import save_faiss_index, build_faiss_index,load_faiss_index
-from src.loaders.pdf_loader import load_from_folder, load_pdfs
-from src.utils.chunking import chunk_documents
+import argparse
+import time
 
-def main():
-    # Initialize logger
-    logger = get_logger(__name__)
+from backend.src.utils.logger import get_logger
+from backend.LLM.components import RetrievalComponents
+from backend.LLM.faiss_indexing import (
+    save_faiss_index, update_faiss_index, convert_faiss_index, supports_removal, migrate_legacy_index,
+    INDEX_PRESETS, DATA_DIR
+)
+from backend.LLM.index_manifest import file_sha256, empty_manifest, load_manifest, save_manifest, diff_files
+from backend.LLM.ingestion import iter_chunked_files, iter_chunk_batches
+from backend.LLM.config import (
+    INGEST_WORKERS, INDEX_BATCH_SIZE, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, EMBEDDING_WORKERS, FAISS_INDEX_TYPE,
+    CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_DEDUP
+)
+from backend.LLM.dedup import ChunkDeduplicator
+from backend.LLM.bm25 import BM25Index
 
-    # Load documents from folder
-    folder_path = "data/raw_data"
-    documents = load_from_folder(folder_path)
+RAW_DATA_DIR = DATA_DIR.parent / "raw_data"
+
+# Chunks are only comparable across runs if they were produced with the same settings
+CHUNKING_SETTINGS = {"unit": "tokens", "size": CHUNK_SIZE, "overlap": CHUNK_OVERLAP, "dedup": CHUNK_DEDUP,
+                     "dedup_scope": "file"}
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+def _record_file(manifest):
+    def on_file(name, file_hash, ids):
+        manifest["files"][name] = {"sha256": file_hash, "chunk_ids": ids}
+    return on_file
 
-    if not documents:
-        logger.error("No documents loaded. Exiting.")
-        return
 
-    # Chunk documents
-    chunks = chunk_documents(documents, chunk_size=500, chunk_overlap=50)
+def _embed_batches(components, faiss_index, batches):
+    """Embed chunk batches into faiss_index, creating it from the first batch when None"""
+    embedded = 0
+    embed_seconds = 0.0
+    for chunks, ids in batches:
+        started = time.perf_counter()
+        if faiss_index is None:
+            faiss_index = components.build_index(chunks, ids=ids)
+            if faiss_index is None:
+                return None
+        elif not update_faiss_index(faiss_index, chunks, ids):
+            return None
+        elapsed = time.perf_counter() - started
 
-    if not chunks:
+        embedded += len(chunks)
+        embed_seconds += elapsed
+        logger.info(
+            f"Embedded {embedded} chunks "
+            f"(batch: {len(chunks) / max(elapsed, 1e-9):.1f} chunks/sec, "
+            f"overall: {embedded / max(embed_seconds, 1e-9):.1f} chunks/sec)"
+        )
+    return faiss_index
+
+
+def _full_build(components, pdf_files, hashes, workers=INGEST_WORKERS, batch_size=INDEX_BATCH_SIZE,
+                index_type=FAISS_INDEX_TYPE):
+    manifest = empty_manifest(components.model_name)
+    manifest["index_type"] = index_type
+    manifest["chunking"] = CHUNKING_SETTINGS
+    deduplicator = ChunkDeduplicator()
+    results = iter_chunked_files(pdf_files, hashes, max_workers=workers)
+    batches = iter_chunk_batches(results, batch_size=batch_size, on_file=_record_file(manifest),
+                                 deduplicator=deduplicator)
+    faiss_index = _embed_batches(components, None, batches)
+    logger.info(f"Dropped {deduplicator.dropped_exact} exact and {deduplicator.dropped_near} near-duplicate chunks.")
+    if faiss_index is None:
         logger.error("No chunks created. Exiting.")
+        return None, None
+
+    # Batches accumulate into a flat index; approximate indexes are trained once all vectors exist
+    convert_faiss_index(faiss_index, index_type)
+    return faiss_index, manifest
+
+
+def _incremental_update(components, manifest, pdf_files, hashes, workers=INGEST_WORKERS,
+                        batch_size=INDEX_BATCH_SIZE):
+    added, changed, removed = diff_files(manifest, hashes)
+    logger.info(f"Index diff: {len(added)} added, {len(changed)} changed, {len(removed)} removed.")
+
+    faiss_index = components.faiss_index
+    if not (added or changed or removed):
+        return faiss_index, manifest
+
+    stale_ids = []
+    for name in changed + removed:
+        stale_ids.extend(manifest["files"].pop(name)["chunk_ids"])
+    if not update_faiss_index(faiss_index, [], [], delete_ids=stale_ids):
+        return None, None
+
+    # Deduplication is per file, so files left untouched by this run never need revisiting
+    to_index = {name: pdf_files[name] for name in added + changed}
+    results = iter_chunked_files(to_index, hashes, max_workers=workers)
+    batches = iter_chunk_batches(results, batch_size=batch_size, on_file=_record_file(manifest),
+                                 deduplicator=ChunkDeduplicator())
+    faiss_index = _embed_batches(components, faiss_index, batches)
+    if faiss_index is None:
+        return None, None
+    return faiss_index, manifest
+
+
+def main(components=None, full=False, workers=INGEST_WORKERS, batch_size=INDEX_BATCH_SIZE,
+         index_type=FAISS_INDEX_TYPE):
+    # Reuse the caller's embedding model when given one
+    components = components or RetrievalComponents(writable=True)
+
+    pdf_files = {path.name: path for path in sorted(RAW_DATA_DIR.glob("*.pdf"))}
+    if not pdf_files:
+        logger.error(f"No PDF files found in {RAW_DATA_DIR}. Exiting.")
         return
+    hashes = {name: file_sha256(path) for name, path in pdf_files.items()}
+
+    manifest = None if full else load_manifest(components.index_path)
+    if manifest is not None and manifest.get("model_name") != components.model_name:
+        logger.warning("Embedding model changed since the last build; rebuilding from scratch.")
+        manifest = None
+    if manifest is not None and components.faiss_index is None:
+        logger.warning("Manifest found but the FAISS index could not be loaded; rebuilding from scratch.")
+        manifest = None
+    if manifest is not None and manifest.get("chunking") != CHUNKING_SETTINGS:
+        logger.warning("Chunking settings changed since the last build; rebuilding from scratch.")
+        manifest = None
+    if manifest is not None and manifest.get("index_type", "Flat") != index_type:
+        logger.warning(f"Index type changed to {index_type}; rebuilding from scratch.")
+        manifest = None
+    if manifest is not None and not supports_removal(components.faiss_index):
+        _, changed, removed = diff_files(manifest, hashes)
+        if changed or removed:
+            logger.warning(f"{index_type} index cannot delete vectors in place; rebuilding from scratch.")
+            manifest = None
 
-    # Build FAISS index
-    faiss_index = build_faiss_index(chunks)
+    if manifest is None:
+        logger.info("Building FAISS index from scratch.")
+        faiss_index, manifest = _full_build(components, pdf_files, hashes, workers, batch_size, index_type)
+    else:
+        faiss_index, manifest = _incremental_update(components, manifest, pdf_files, hashes, workers, batch_size)
 
     if not faiss_index:
         logger.error("FAISS index could not be built. Exiting.")
         return
 
-    # Save FAISS index
-    save_faiss_index(faiss_index)
+    # Save FAISS index, then the manifest that describes it
+    save_faiss_index(faiss_index, components.index_path, index_type=index_type)
+    # The lexical index is cheap next to embedding, so it is always rebuilt from the final docstore
+    BM25Index.from_faiss_index(faiss_index).save(components.index_path)
+    save_manifest(manifest, components.index_path)
     logger.info("FAISS index creation and saving completed successfully.")
 
+
 if __name__ == "__main__":
-    main()
-    load_faiss_index()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build or incrementally update the FAISS index from data/raw_data.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild the whole index.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="PDF parsing processes (default: all cores).")
+    parser.add_argument("--migrate", action="store_true",
+                        help="Convert a legacy pickled index (index.pkl) to the pickle-free format and exit.")
+    parser.add_argument("--index-type", default=FAISS_INDEX_TYPE,
+                        help=f"One of {', '.join(INDEX_PRESETS)} or a faiss.index_factory string.")
+    parser.add_argument("--index-batch-size", type=int, default=INDEX_BATCH_SIZE,
+                        help="Chunks added to the index per step.")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBEDDING_BATCH_SIZE,
+                        help="sentence-transformers encode() batch size.")
+    parser.add_argument("--threads", type=int, default=EMBEDDING_THREADS, help="torch threads for embedding.")
+    parser.add_argument("--multi-process", action="store_true",
+                        help="Shard embedding across several sentence-transformers processes.")
+    parser.add_argument("--embed-workers", type=int, default=EMBEDDING_WORKERS,
+                        help="CPU processes for --multi-process (default: min(cores, 4)).")
+    args = parser.parse_args()
+
+    components = RetrievalComponents(writable=True, embedding_options={
+        "batch_size": args.embed_batch_size,
+        "num_threads": args.threads,
+        "multi_process": args.multi_process,
+        "workers": args.embed_workers,
+    })
+    try:
+        if args.migrate:
+            if not migrate_legacy_index(components.index_path, embedding_model=components.embedding_model):
+                logger.error("Index migration failed.")
+        else:
+            main(components, full=args.full, workers=args.workers, batch_size=args.index_batch_size,
+                 index_type=args.index_type)
+    finally:
+        # Stops the --multi-process embedding pool, started once for the whole build
+        components.close_embedding_model()
@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from backend.LLM.chunking import chunk_documents
+from backend.LLM.config import CHUNK_SIZE, CHUNK_OVERLAP, INDEX_BATCH_SIZE
+from backend.LLM.index_manifest import chunk_ids_for
+from backend.LLM.pdf_loader import load_pdfs
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+
+def _parse_and_chunk(name, pdf_path, file_hash, chunk_size, chunk_overlap):
+    """Worker: parse one PDF and chunk it in the same process, so only chunks travel back"""
+    documents = load_pdfs([pdf_path])
+    chunks = chunk_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return name, file_hash, chunks, chunk_ids_for(name, file_hash, len(chunks))
+
+
+def iter_chunked_files(pdf_files, hashes, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                       max_workers=None, max_pending=None):
+    """
+    Parse and chunk PDFs in a process pool, yielding each file as soon as it is done.
+
+    At most max_pending files (default 2 per worker) are in flight, which bounds memory
+    regardless of corpus size.
+
+    Args:
+        pdf_files: {file name: path}
+        hashes: {file name: sha256}
+
+    Yields:
+        (file name, sha256, chunks, chunk ids), in completion order
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * max_workers
+    tasks = iter(pdf_files.items())
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        while True:
+            for name, pdf_path in tasks:
+                pending.add(pool.submit(
+                    _parse_and_chunk, name, str(pdf_path), hashes[name], chunk_size, chunk_overlap
+                ))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"Error parsing PDF in worker: {e}")
+
+
+def iter_chunk_batches(file_results, batch_size=INDEX_BATCH_SIZE, on_file=None, deduplicator=None):
+    """
+    Regroup per-file chunks into fixed-size batches for embedding.
+
+    on_file(name, sha256, chunk ids) is called for every file as it arrives, so callers can
+    record it (e.g. in the index manifest) without holding on to its chunks. With a
+    ChunkDeduplicator, chunks duplicating an earlier chunk of the same file are dropped first
+    and only the surviving ids are reported. Deduplication stays within a file because
+    incremental updates delete chunks per file: a chunk dropped as a copy of another file's
+    chunk would be lost once that other file changed or was removed.
+
+    Yields:
+        (chunks, ids) with len(chunks) <= batch_size
+    """
+    batch_chunks, batch_ids = [], []
+    for name, file_hash, chunks, ids in file_results:
+        if deduplicator is not None:
+            deduplicator.reset()
+            total = len(chunks)
+            chunks, ids = deduplicator.filter(chunks, ids)
+            logger.info(f"Chunked {name}: {len(chunks)} chunks ({total - len(chunks)} duplicates dropped)")
+        else:
+            logger.info(f"Chunked {name}: {len(chunks)} chunks")
+        if on_file is not None:
+            on_file(name, file_hash, ids)
+        batch_chunks.extend(chunks)
+        batch_ids.extend(ids)
+        while len(batch_chunks) >= batch_size:
+            yield batch_chunks[:batch_size], batch_ids[:batch_size]
+            batch_chunks, batch_ids = batch_chunks[batch_size:], batch_ids[batch_size:]
+    if batch_chunks:
+        yield batch_chunks, batch_ids
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, BaseCallbackHandler, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from backend.LLM.config import (
+    LLM_PROVIDER, LLM_FALLBACK_PROVIDER, FAKE_LLM_RESPONSES, FAKE_LLM_LATENCY_MEDIAN_MS,
+    FAKE_LLM_LATENCY_SIGMA, FAKE_LLM_TOKEN_DELAY_MS, FAKE_LLM_SEED
+)
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+PROVIDERS = ("openai", "fake")
+
+# Tag on runs of a fallback model, so callers can tell degraded replies from real ones
+FALLBACK_TAG = "llm_fallback"
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+def _message_text(message):
+    """Plain text of a message, including the text parts of multi-part content"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local chat model.
+
+    The reply is one of `responses`, picked by a hash of the prompt so the same prompt always
+    gets the same reply regardless of call order or concurrency. Replies are templates and may
+    use {input} (the last human message). Latency is sampled per call from a log-normal
+    distribution around `latency_median_ms`, and streamed replies arrive word by word
+    `token_delay_ms` apart. Async calls sleep on the event loop instead of blocking it.
+    """
+
+    responses: List[str] = list(FAKE_LLM_RESPONSES)
+    latency_median_ms: float = FAKE_LLM_LATENCY_MEDIAN_MS
+    latency_sigma: float = FAKE_LLM_LATENCY_SIGMA
+    token_delay_ms: float = FAKE_LLM_TOKEN_DELAY_MS
+    seed: int = FAKE_LLM_SEED
+
+    _rng: Any = PrivateAttr(default=None)
+    _rng_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages):
+        humans = [m for m in messages if isinstance(m, HumanMessage)]
+        last_input = _message_text(humans[-1]) if humans else ""
+        prompt = "\n".join(_message_text(m) for m in messages)
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        template = self.responses[digest % len(self.responses)]
+        return template.replace("{input}", last_input)
+
+    def _first_token_delay(self):
+        """Seconds before the first token; 0 when no latency is configured"""
+        if self.latency_median_ms <= 0:
+            return 0.0
+        with self._rng_lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            sample = self._rng.lognormvariate(0.0, self.latency_sigma) if self.latency_sigma > 0 else 1.0
+        return self.latency_median_ms * sample / 1000.0
+
+    def _tokens(self, text):
+        return _TOKEN.findall(text) or [text]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        delay = self._first_token_delay() + len(self._tokens(text)) * self.token_delay_ms / 1000.0
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        delay = self._first_token_delay() + len(self._tokens(text)) * self.token_delay_ms / 1000.0
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        delay = self._first_token_delay()
+        for token in self._tokens(self._reply(messages)):
+            delay += self.token_delay_ms / 1000.0
+            if delay:
+                time.sleep(delay)
+                delay = 0.0
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        delay = self._first_token_delay()
+        for token in self._tokens(self._reply(messages)):
+            delay += self.token_delay_ms / 1000.0
+            if delay:
+                await asyncio.sleep(delay)
+                delay = 0.0
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FallbackTracker(BaseCallbackHandler):
+    """
+    Callback recording whether a fallback model answered during a run.
+
+    Pass it in the run config's callbacks; with required_tag, only model runs carrying that tag
+    as well (e.g. the answer model, not the question rewrite) count.
+    """
+
+    def __init__(self, required_tag=None):
+        self.required_tag = required_tag
+        self.used = False
+
+    def on_chat_model_start(self, serialized, messages, *, tags=None, **kwargs):
+        tags = tags or []
+        if FALLBACK_TAG in tags and (self.required_tag is None or self.required_tag in tags):
+            self.used = True
+
+
+def _create_provider_model(provider, model_name, streaming, fake_responses, **kwargs):
+    if provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model_name, temperature=0, openai_api_key=api_key, streaming=streaming, **kwargs)
+    if provider == "fake":
+        if fake_responses:
+            return FakeChatModel(responses=list(fake_responses))
+        return FakeChatModel()
+    raise ValueError(f"Unknown LLM provider '{provider}'; expected one of {PROVIDERS}")
+
+
+def provider_available(provider=None, fallback=LLM_FALLBACK_PROVIDER):
+    """True if create_chat_model can return a model for this configuration"""
+    provider = provider or LLM_PROVIDER
+    if provider == "openai" and not os.getenv("OPENAI_API_KEY"):
+        return fallback == "fake"
+    return provider in PROVIDERS
+
+
+def create_chat_model(model_name, streaming=False, provider=None, fallback=LLM_FALLBACK_PROVIDER,
+                      fake_responses=None, **kwargs):
+    """
+    Chat model for the configured provider.
+
+    When a fallback provider is set, it takes over if the primary one cannot be created
+    (e.g. no API key) and, per call, whenever the primary raises, so an outage degrades the
+    answers instead of failing the request. fake_responses overrides the fake provider's
+    reply templates, for both primary and fallback use. Fallback runs are tagged FALLBACK_TAG
+    (see FallbackTracker) so their canned replies can be kept out of caches.
+
+    Raises:
+        ValueError: if neither the provider nor the fallback can be created
+    """
+    provider = provider or LLM_PROVIDER
+    try:
+        llm = _create_provider_model(provider, model_name, streaming, fake_responses, **kwargs)
+    except ValueError as e:
+        if not fallback or fallback == provider:
+            raise
+        logger.warning(f"LLM provider '{provider}' unavailable ({e}); using '{fallback}' instead.")
+        return _create_provider_model(fallback, model_name, streaming, fake_responses, **kwargs).with_config(
+            tags=[FALLBACK_TAG]
+        )
+
+    if not fallback or fallback == provider:
+        return llm
+    try:
+        backup = _create_provider_model(fallback, model_name, streaming, fake_responses)
+    except ValueError as e:
+        logger.warning(f"Fallback LLM provider '{fallback}' unavailable ({e}); running without one.")
+        return llm
+    return llm.with_fallbacks([backup.with_config(tags=[FALLBACK_TAG])])
@@ -15,7 +15,7 @@ def load_pdfs(pdf_paths):
             continue
         loader=PyPDFLoader(str(pdf_path))
         docs=loader.load()
-        print(f"[Info] Loaded {len(docs)} documents from {pdf_path.name}")
+        logger.info(f"Loaded {len(docs)} documents from {pdf_path.name}")
         documents.extend(docs)
     return documents
 
@@ -1,18 +1,21 @@
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 from backend.src.utils.logger import get_logger
 from operator import itemgetter
 
 # LangChain components
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_classic.chains import create_history_aware_retriever, create_retrieval_chain
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.runnables import RunnablePassthrough, RunnableMap
-import tiktoken
-from backend.LLM.config import MAX_INPUT_TOKENS, model_name
+from langchain_core.runnables import RunnablePassthrough, RunnableMap, RunnableLambda
+from backend.LLM.config import MAX_INPUT_TOKENS, MAX_HISTORY_TOKENS, MAX_CONTEXT_TOKENS, RETRIEVER_K, model_name
+from backend.LLM.answer_cache import normalize_question
+from backend.LLM.llm_provider import FallbackTracker, create_chat_model
+from backend.LLM.tokens import enforce_token_limit, trim_messages_to_budget, trim_documents_to_budget
 
 import json
 from typing import AsyncIterator
@@ -23,6 +26,9 @@ logger = get_logger(__name__)
 # Session management
 session_store = {}
 
+# Tag on the answer-generation model, so streaming can tell its tokens from the question rewrite's
+ANSWER_TAG = "qa_answer"
+
 
 # TODO: Cloud deployement
 def get_session_history(session_id: str):
@@ -51,87 +57,74 @@ def get_active_sessions():
     return list(session_store.keys())
 
 
-# Setting Input Token Limits
-
-def count_tokens(text, model_name):
-    try:
-        enc = tiktoken.encoding_for_model(model_name)
-    except KeyError:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
-
-def enforce_token_limit(text, model_name, max_tokens=MAX_INPUT_TOKENS, ):
-    enc = tiktoken.encoding_for_model(model_name)
-    tokens = enc.encode(text)
-    if len(tokens) > max_tokens:
-        truncated = enc.decode(tokens[:max_tokens])
-        logger.warning(f"Input truncated from {len(tokens)} to {max_tokens} tokens.")
-        return truncated
-    return text
-
+# Prompts are immutable, so both chains share one instance of each
+CONTEXTUALIZE_Q_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a smart assistant specialized in sauna use, wellness, and health benefits. "
+     "Your task is to rewrite the latest user question into a clear, standalone question that can be "
+     "understood without the conversation history. "
+     "Include relevant context from previous messages ONLY if it helps the retriever find relevant information. "
+     "Preserve references to sauna effects, health, recovery, longevity, or wellness topics. "
+     "Do not add extra information, answers, or explanations — only rewrite the question for retrieval."),
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "{input}")
+])
+
+QA_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a sauna health assistant designed for the general public. "
+     "You answer questions about sauna use, health effects, psychology, recovery, longevity, and related wellness topics.\n\n"
+     "Your primary knowledge source is the scientific papers provided to you in the retrieved context. "
+     "Follow these rules:\n"
+     "1. ALWAYS check the retrieved PDF context first when answering.\n"
+     "2. If the retrieved context does NOT contain relevant information, fall back to your general knowledge, "
+     "making it clear it is general guidance.\n"
+     "3. Never invent or fabricate specific study results.\n"
+     "4. Use the ongoing conversation history to interpret pronouns and references.\n"
+     "5. Answer in a friendly, simple, and accessible way.\n"
+     "6. Provide gentle disclaimers for medical or safety advice.\n"
+     "7. If the question is outside sauna/wellness, answer concisely.\n"
+     "Be concise, accurate, and grounded in context when possible.\n\nContext: {context}"),
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "{input}")
+])
+
+
+def create_qa_chain(faiss_index, model_name, streaming=False, retriever=None):
+    """
+    Build the history-aware RAG chain.
 
-def create_qa_chain(faiss_index, model_name, streaming=False, ):
+    Pass the shared retriever from RetrievalComponents to avoid creating one per chain;
+    when omitted, a retriever is created from faiss_index.
+    """
     try:
         if faiss_index is None:
             logger.error("Cannot create QA chain: FAISS index is None")
             return None
             
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error("Cannot create QA chain: OPENAI_API_KEY not found in environment variables")
-            return None
-            
-        llm = ChatOpenAI(
-            model=model_name,
-            temperature=0,
-            openai_api_key=api_key,
-            max_tokens=500,
-            streaming=streaming
-        )
+        llm = create_chat_model(model_name, streaming=streaming, max_tokens=500)
+        # If the provider is down the rewrite degrades to the question as asked, which still retrieves
+        rewrite_llm = create_chat_model(model_name, max_tokens=500, fake_responses=["{input}"])
 
-        retriever = faiss_index.as_retriever(search_kwargs={"k": 3})
+        if retriever is None:
+            retriever = faiss_index.as_retriever(search_kwargs={"k": RETRIEVER_K})
 
         # --- 1. History-aware Retriever Chain ---
-        contextualize_q_prompt = ChatPromptTemplate.from_messages([
-            ("system",
-             "You are a smart assistant specialized in sauna use, wellness, and health benefits. "
-             "Your task is to rewrite the latest user question into a clear, standalone question that can be "
-             "understood without the conversation history. "
-             "Include relevant context from previous messages ONLY if it helps the retriever find relevant information. "
-             "Preserve references to sauna effects, health, recovery, longevity, or wellness topics. "
-             "Do not add extra information, answers, or explanations — only rewrite the question for retrieval."),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
         history_aware_retriever = create_history_aware_retriever(
-            llm, retriever, contextualize_q_prompt
+            rewrite_llm, retriever, CONTEXTUALIZE_Q_PROMPT
+        )
+
+        # Keep the stuffed context within the prompt budget
+        budgeted_retriever = history_aware_retriever | RunnableLambda(
+            lambda docs: trim_documents_to_budget(docs, MAX_CONTEXT_TOKENS, model_name)
         )
 
         # --- 2. Document Combination Chain (Answer Generation) ---
-        qa_prompt = ChatPromptTemplate.from_messages([
-            ("system",
-             "You are a sauna health assistant designed for the general public. "
-             "You answer questions about sauna use, health effects, psychology, recovery, longevity, and related wellness topics.\n\n"
-             "Your primary knowledge source is the scientific papers provided to you in the retrieved context. "
-             "Follow these rules:\n"
-             "1. ALWAYS check the retrieved PDF context first when answering.\n"
-             "2. If the retrieved context does NOT contain relevant information, fall back to your general knowledge, "
-             "making it clear it is general guidance.\n"
-             "3. Never invent or fabricate specific study results.\n"
-             "4. Use the ongoing conversation history to interpret pronouns and references.\n"
-             "5. Answer in a friendly, simple, and accessible way.\n"
-             "6. Provide gentle disclaimers for medical or safety advice.\n"
-             "7. If the question is outside sauna/wellness, answer concisely.\n"
-             "Be concise, accurate, and grounded in context when possible.\n\nContext: {context}"),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
-        document_combiner = create_stuff_documents_chain(llm, qa_prompt)
+        document_combiner = create_stuff_documents_chain(llm.with_config(tags=[ANSWER_TAG]), QA_PROMPT)
 
         # --- 3. Final Retrieval Chain ---
         final_retrieval_chain = create_retrieval_chain(
-            history_aware_retriever,
+            budgeted_retriever,
             document_combiner,
         )
 
@@ -141,7 +134,12 @@ def create_qa_chain(faiss_index, model_name, streaming=False, ):
             response["output"] = response.get("answer", "")
             return response
 
-        final_chain_with_output = final_retrieval_chain | add_output_key
+        # Window the stored history to the most recent messages that fit the token budget
+        windowed_history = RunnablePassthrough.assign(
+            chat_history=lambda x: trim_messages_to_budget(x.get("chat_history", []), MAX_HISTORY_TOKENS, model_name)
+        )
+
+        final_chain_with_output = windowed_history | final_retrieval_chain | add_output_key
 
         # --- 5. Chain with Memory ---
         chain_with_memory = RunnableWithMessageHistory(
@@ -160,7 +158,68 @@ def create_qa_chain(faiss_index, model_name, streaming=False, ):
         return None
 
 
-def chat(chat_chain, question: str, session_id: str):
+def _source_names(documents):
+    """Collapse retrieved documents to the set of source file names"""
+    sources_info = set()
+    for doc in documents:
+        metadata = getattr(doc, "metadata", {})
+        source_path = metadata.get("source") or metadata.get("file_name") or "unknown"
+        sources_info.add(os.path.basename(source_path))
+    return list(sources_info)
+
+
+def _history_as_dicts(history_obj):
+    return [{"role": msg.type, "content": msg.content} for msg in history_obj.messages]
+
+
+def _invoke(chat_chain, question, session_id):
+    """Run the chain with memory and return (answer, source names, whether a fallback model answered)"""
+    fallback = FallbackTracker(required_tag=ANSWER_TAG)
+    response = chat_chain.invoke(
+        {"input": question},
+        config={"configurable": {"session_id": session_id}, "callbacks": [fallback]}
+    )
+
+    # Get answer text (now both 'answer' and 'output' should exist)
+    answer = response.get("answer") or response.get("output") or ""
+
+    # Get sources (documents)
+    return answer, _source_names(response.get("context", [])), fallback.used
+
+
+def _answer_standalone(chat_chain, question, answer_cache=None, index_version=None):
+    """
+    Answer a first-turn question independently of any user session.
+
+    The chain runs against a throwaway session so its result can be shared (answer cache,
+    coalesced requests); callers record the exchange in their own session history.
+
+    Returns:
+        (answer, sources, fallback): fallback is True when a fallback model produced the
+        answer, which is then not cached
+    """
+    cache_vector = None
+    if answer_cache is not None:
+        hit, cache_vector = answer_cache.lookup(question, index_version=index_version)
+        if hit is not None:
+            return hit["answer"], hit["sources"], False
+
+    started = time.perf_counter()
+    scratch_session_id = f"standalone-{uuid.uuid4()}"
+    try:
+        answer, sources, fallback = _invoke(chat_chain, question, scratch_session_id)
+    finally:
+        session_store.pop(scratch_session_id, None)
+
+    if fallback:
+        logger.warning(f"Fallback LLM answered; not caching or sharing the answer to: {question}")
+    elif answer_cache is not None:
+        answer_cache.store(question, answer, sources, time.perf_counter() - started, vector=cache_vector,
+                           index_version=index_version)
+    return answer, sources, fallback
+
+
+def chat(chat_chain, question: str, session_id: str, answer_cache=None, coalescer=None, index_version=None):
     """
     Send a question to the memory-aware chat chain and return a consistent output including chat history.
 
@@ -168,6 +227,12 @@ def chat(chat_chain, question: str, session_id: str):
         chat_chain: The initialized QA chain
         question: User's question
         session_id: REQUIRED unique identifier for the user/session (e.g., user_id, session_token)
+        answer_cache: Optional SemanticAnswerCache. Only consulted on the first turn of a session,
+            where the question is already standalone and no history can change its meaning.
+        coalescer: Optional SingleFlight. Concurrent first-turn questions with the same normalized
+            text share one pipeline execution; each session still gets its own history entries.
+        index_version: Version of the document index chat_chain runs on. Cached answers and
+            coalesced executions are only shared between requests on the same version.
 
     Returns:
         dict: {
@@ -186,35 +251,76 @@ def chat(chat_chain, question: str, session_id: str):
 
         question = enforce_token_limit(question, model_name=model_name, max_tokens=MAX_INPUT_TOKENS)
 
-        # Invoke chain with memory
-        response = chat_chain.invoke(
-            {"input": question},
-            config={"configurable": {"session_id": session_id}}
-        )
-
-        # Get answer text (now both 'answer' and 'output' should exist)
-        answer = response.get("answer") or response.get("output") or ""
-
-        # Get sources (documents)
-        sources = response.get("context", [])
-        sources_info = set()
-        for doc in sources:
-            metadata = getattr(doc, "metadata", {})
-            source_path = metadata.get("source") or metadata.get("file_name") or "unknown"
-            sources_info.add(os.path.basename(source_path))
-
-        # Fetch full chat history from session store
         history_obj = get_session_history(session_id)
-        chat_history_list = [{"role": msg.type, "content": msg.content} for msg in history_obj.messages]
+        if not history_obj.messages:
+            if coalescer is not None:
+                (answer, sources, fallback), shared = coalescer.do(
+                    (index_version, normalize_question(question)),
+                    lambda: _answer_standalone(chat_chain, question, answer_cache, index_version)
+                )
+                if shared and fallback:
+                    # A canned fallback reply is not worth sharing; try the provider again
+                    answer, sources, _ = _answer_standalone(chat_chain, question, answer_cache, index_version)
+            else:
+                answer, sources, _ = _answer_standalone(chat_chain, question, answer_cache, index_version)
+            history_obj.add_user_message(question)
+            history_obj.add_ai_message(answer)
+        else:
+            if answer_cache is not None:
+                # Follow-up questions depend on the conversation, so a cached answer could be wrong
+                answer_cache.record_bypass()
+            answer, sources, _ = _invoke(chat_chain, question, session_id)
 
         return {
             "answer": answer,
-            "sources": list(sources_info),
+            "sources": list(sources),
             "session_id": session_id,
-            "chat_history": chat_history_list
+            "chat_history": _history_as_dicts(history_obj)
         }
 
     except Exception as e:
         logger.error(f"Error processing chat: {e}")
         return None
 
+
+async def chat_stream(chat_chain, question: str, session_id: str) -> AsyncIterator[dict]:
+    """
+    Stream an answer from the memory-aware chat chain as WebSocket-ready messages.
+
+    Yields:
+        {"type": "token", "content": str} for every answer token, then
+        {"type": "sources", "content": List[str]} and {"type": "end", "answer": str, "session_id": str},
+        or a single {"type": "error", "content": str} if the chain fails
+    """
+    if chat_chain is None:
+        logger.error("Chat chain is None. Cannot process the question.")
+        yield {"type": "error", "content": "Chat service unavailable."}
+        return
+
+    try:
+        logger.info(f"Streaming question: {question} for session: {session_id}")
+
+        question = enforce_token_limit(question, model_name=model_name, max_tokens=MAX_INPUT_TOKENS)
+
+        tokens = []
+        final_output = {}
+        async for event in chat_chain.astream_events(
+            {"input": question},
+            config={"configurable": {"session_id": session_id}},
+            version="v2"
+        ):
+            if event["event"] == "on_chat_model_stream" and ANSWER_TAG in event.get("tags", []):
+                token = event["data"]["chunk"].content
+                if token:
+                    tokens.append(token)
+                    yield {"type": "token", "content": token}
+            elif event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                final_output = event["data"].get("output") or {}
+
+        answer = final_output.get("answer") or "".join(tokens)
+        yield {"type": "sources", "content": _source_names(final_output.get("context", []))}
+        yield {"type": "end", "answer": answer, "session_id": session_id}
+
+    except Exception as e:
+        logger.error(f"Error streaming chat: {e}", exc_info=True)
+        yield {"type": "error", "content": "Error generating the answer."}
@@ -0,0 +1,126 @@
+from functools import lru_cache
+
+import tiktoken
+
+from backend.LLM.config import model_name as default_model_name, FALLBACK_ENCODING, MAX_INPUT_TOKENS
+from backend.src.utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# A token always covers at least one UTF-8 byte and a character is at most 4 bytes,
+# so these bounds let short texts skip encoding entirely.
+_MAX_BYTES_PER_CHAR = 4
+
+# tiktoken's batch encoder starts a thread pool per call; below this many texts a plain loop is cheaper
+_BATCH_THREADS_MIN_TEXTS = 256
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model_name=default_model_name):
+    """Return the process-wide cached tiktoken encoder for a model (falls back to FALLBACK_ENCODING)."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        logger.warning(f"No tiktoken encoding registered for '{model_name}', using {FALLBACK_ENCODING}.")
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+
+
+def _upper_bound(text):
+    """Cheap upper bound on the token count of text, without encoding it"""
+    if text.isascii():
+        return len(text)
+    return len(text) * _MAX_BYTES_PER_CHAR
+
+
+def count_tokens(text, model_name=default_model_name):
+    """Count tokens in text. Special-token markers in user text are treated as plain text."""
+    if not text:
+        return 0
+    return len(get_encoder(model_name).encode_ordinary(text))
+
+
+def count_tokens_batch(texts, model_name=default_model_name, num_threads=8):
+    """
+    Count tokens for many texts.
+
+    Small inputs (the per-request trims) loop over the cached encoder; only large ones, such as
+    indexing, use tiktoken's threaded batch encoder.
+    """
+    if not texts:
+        return []
+    encoder = get_encoder(model_name)
+    if len(texts) < _BATCH_THREADS_MIN_TEXTS:
+        return [len(encoder.encode_ordinary(text)) for text in texts]
+    encoded = encoder.encode_ordinary_batch(list(texts), num_threads=num_threads)
+    return [len(tokens) for tokens in encoded]
+
+
+def token_length_function(model_name=default_model_name):
+    """Return a len()-style callable measuring tokens, for text splitters"""
+    encoder = get_encoder(model_name)
+
+    def _length(text):
+        return len(encoder.encode_ordinary(text))
+
+    return _length
+
+
+def enforce_token_limit(text, model_name=default_model_name, max_tokens=MAX_INPUT_TOKENS):
+    """Truncate text to max_tokens tokens. Returns the text unchanged when it already fits."""
+    if not text or _upper_bound(text) <= max_tokens:
+        return text
+
+    enc = get_encoder(model_name)
+    tokens = enc.encode_ordinary(text)
+    if len(tokens) > max_tokens:
+        truncated = enc.decode(tokens[:max_tokens])
+        logger.warning(f"Input truncated from {len(tokens)} to {max_tokens} tokens.")
+        return truncated
+    return text
+
+
+def trim_messages_to_budget(messages, max_tokens, model_name=default_model_name):
+    """
+    Keep the most recent chat messages whose combined content fits in max_tokens.
+
+    Messages are dropped from the oldest end; order is preserved.
+    """
+    if not messages:
+        return []
+
+    contents = [msg.content if isinstance(msg.content, str) else str(msg.content) for msg in messages]
+    counts = count_tokens_batch(contents, model_name)
+
+    kept = 0
+    used = 0
+    for count in reversed(counts):
+        if used + count > max_tokens:
+            break
+        used += count
+        kept += 1
+
+    if kept < len(messages):
+        logger.debug(f"History windowed from {len(messages)} to {kept} messages ({used} tokens).")
+    return list(messages[len(messages) - kept:])
+
+
+def trim_documents_to_budget(documents, max_tokens, model_name=default_model_name):
+    """Keep retrieved documents in rank order until their page content exhausts max_tokens"""
+    if not documents:
+        return []
+
+    counts = count_tokens_batch([doc.page_content for doc in documents], model_name)
+
+    kept = []
+    used = 0
+    for doc, count in zip(documents, counts):
+        # Always keep the top-ranked document, even if it alone is over budget
+        if kept and used + count > max_tokens:
+            break
+        used += count
+        kept.append(doc)
+
+    if len(kept) < len(documents):
+        logger.debug(f"Context trimmed from {len(documents)} to {len(kept)} documents ({used} tokens).")
+    return kept
@@ -1,14 +1,14 @@
-import os
 from dotenv import load_dotenv
 from backend.src.utils.logger import get_logger
 # LangChain components
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 from langchain_core.chat_history import InMemoryChatMessageHistory
 
 from langchain_classic import LLMChain
 
+from backend.LLM.llm_provider import create_chat_model
+
 load_dotenv()
 logger = get_logger(__name__)
 
@@ -47,16 +47,7 @@ def get_active_sessions():
 
 def brief_setup(model_name):
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error("Cannot create QA chain: OPENAI_API_KEY not found in environment variables")
-            return None
-
-        llm = ChatOpenAI(
-            model=model_name,
-            temperature=0,
-            openai_api_key=api_key,
-        )
+        llm = create_chat_model(model_name)
         prompt = ChatPromptTemplate.from_messages([
             ("system",
              "You are an AI sauna assistant. Generate exactly 4 lines for a sauna session summary in this format and nothing else. Use numbers if necessary. The time is on seconds, temperature is in Celsius, and humidity is in percentage (%).\n\n"
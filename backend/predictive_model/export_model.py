@@ -0,0 +1,133 @@
+"""
+Export the trained sauna recommendation model for serving
+Run this script after training to write the NumPy (.npz), TorchScript (.pt) and ONNX (.onnx)
+artifacts next to the model and check each of them against the torch model
+Each artifact is written to a temporary file and only moved into place once it passes
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.predictive_model.inference import compare_engines
+from backend.predictive_model.numpy_inference import NumpyRecommendationEngine
+
+# Folding and graph export change float rounding only; anything above this means the export is wrong
+PARITY_TOLERANCE = 1e-3
+# The lookup grid interpolates, so it is held to the accuracy users can notice instead
+GRID_TOLERANCE = 0.25
+
+NUMPY_MODEL_NAME = "sauna_recommendation_model.npz"
+TORCHSCRIPT_MODEL_NAME = "sauna_recommendation_model.pt"
+ONNX_MODEL_NAME = "sauna_recommendation_model.onnx"
+MODEL_META_NAME = "sauna_recommendation_meta.json"
+GRID_MODEL_NAME = "sauna_recommendation_grid.npz"
+
+
+def check_parity(engine, candidate, tolerance: float = PARITY_TOLERANCE, n_samples: int = 2000) -> dict:
+    """Parity report of candidate against the torch engine, with a pass/fail verdict"""
+    report = compare_engines(engine, candidate, n_samples=n_samples)
+    worst = max(value for key, value in report.items() if key.startswith('max_abs_error'))
+    report['passed'] = worst <= tolerance
+    return report
+
+
+def temporary_path(path: Path) -> Path:
+    """Sibling path an artifact is written to before it passes its parity check"""
+    return path.with_name(f"{path.stem}.tmp{path.suffix}")
+
+
+def publish(report: dict, tmp_path: Path, path: Path) -> dict:
+    """Move a checked artifact into place; a failing one is discarded so it is never served"""
+    if report['passed']:
+        os.replace(tmp_path, path)
+    else:
+        print(f"Parity check failed for {path.name}; keeping the previous file")
+        tmp_path.unlink(missing_ok=True)
+    return report
+
+
+def export_numpy_model(engine, npz_path) -> dict:
+    """Export engine to npz_path and return the parity report of the exported model"""
+    npz_path = Path(npz_path)
+    tmp_path = temporary_path(npz_path)
+    engine.export_numpy(str(tmp_path))
+    return publish(check_parity(engine, NumpyRecommendationEngine(str(tmp_path))), tmp_path, npz_path)
+
+
+def export_all(engine, output_dir) -> dict:
+    """
+    Write every serving artifact to output_dir
+    
+    Returns:
+        {runtime: parity report}; runtimes whose exporter or runtime package is missing are skipped
+    """
+    from backend.predictive_model.runtimes import TorchScriptRecommendationEngine, OnnxRecommendationEngine
+    from backend.predictive_model.lookup_grid import RecommendationGrid
+    
+    output_dir = Path(output_dir)
+    meta_path = output_dir / MODEL_META_NAME
+    engine.export_metadata(str(meta_path))
+    
+    reports = {'numpy': export_numpy_model(engine, output_dir / NUMPY_MODEL_NAME)}
+    
+    torchscript_path = output_dir / TORCHSCRIPT_MODEL_NAME
+    tmp_path = temporary_path(torchscript_path)
+    engine.export_torchscript(str(tmp_path))
+    reports['torchscript'] = publish(
+        check_parity(engine, TorchScriptRecommendationEngine(str(tmp_path), str(meta_path))), tmp_path, torchscript_path
+    )
+    
+    onnx_path = output_dir / ONNX_MODEL_NAME
+    tmp_path = temporary_path(onnx_path)
+    try:
+        engine.export_onnx(str(tmp_path))
+        reports['onnx'] = publish(
+            check_parity(engine, OnnxRecommendationEngine(str(tmp_path), str(meta_path))), tmp_path, onnx_path
+        )
+    except ImportError as e:
+        print(f"Skipping ONNX export: {e}")
+        tmp_path.unlink(missing_ok=True)
+    
+    # The grid is checked in memory, so a grid outside the tolerance is never written
+    grid = RecommendationGrid.build(engine)
+    reports['grid'] = check_parity(engine, grid, tolerance=GRID_TOLERANCE, n_samples=20000)
+    if reports['grid']['passed']:
+        grid.save(str(output_dir / GRID_MODEL_NAME))
+    else:
+        print(f"Grid exceeds the {GRID_TOLERANCE} tolerance; keeping the previous file")
+    
+    return reports
+
+
+def print_parity(name: str, report: dict):
+    print(f"\n{name} parity vs torch:")
+    for key, value in report.items():
+        print(f"  - {key}: {value}")
+
+
+def main():
+    """Export the trained model next to it"""
+    from backend.predictive_model.neural_network import SaunaRecommendationEngine
+    
+    script_dir = Path(__file__).parent
+    model_path = script_dir / "sauna_recommendation_model.pth"
+    scaler_path = script_dir / "sauna_scaler.pkl"
+    
+    if not model_path.exists() or not scaler_path.exists():
+        print(f"Error: trained model not found at {model_path}")
+        print("Please run train_model.py first")
+        return 1
+    
+    engine = SaunaRecommendationEngine(model_path=str(model_path), scaler_path=str(scaler_path))
+    reports = export_all(engine, script_dir)
+    for runtime, report in reports.items():
+        print_parity(runtime, report)
+    return 0 if all(report['passed'] for report in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
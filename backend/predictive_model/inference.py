@@ -0,0 +1,249 @@
+"""
+Runtime-independent parts of sauna recommendation inference
+Feature building, goal resolution and output post-processing shared by every engine,
+kept free of torch, sklearn and pandas so light-weight runtimes can use them
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Goal mapping from frontend to CSV
+GOAL_MAPPING = {
+    'stress_reduction': 'stress_relief',
+    'improving_sleep_quality': 'sleep_quality',
+    'cardiovascular_health': 'cardiovascular_health',
+    'muscle_recovery': 'muscle_recovery',
+    'longevity': 'longevity',
+    'cold_recovery': 'cold_recovery',
+}
+
+# Numeric feature columns, followed by the goal one-hot columns
+NUMERIC_FEATURES = ['age', 'BMI', 'body_mass', 'height']
+
+# Output bounds: temperature 60-100°C, humidity 5-25%, session length 10-30 minutes
+OUTPUT_NAMES = ('temperature', 'humidity', 'session_length')
+OUTPUT_MIN = np.array([60.0, 5.0, 10.0])
+OUTPUT_MAX = np.array([100.0, 25.0, 30.0])
+
+
+class RecommendationPredictor:
+    """
+    Base class for recommendation engines
+    Subclasses set goal_mapping, all_goals and goal_columns and implement _forward(),
+    which maps an unscaled feature matrix to raw (temperature, humidity, session_length) rows
+    """
+    
+    goal_mapping: Dict[str, str]
+    all_goals: List[str]
+    goal_columns: List[str]
+    
+    # Multi-goal blending: a goal's weight is goal_weights.get(goal, 1.0) * goal_order_decay ** rank,
+    # where rank is its position in the user's selection (decay 1.0 weighs all selected goals equally).
+    # Weights must be non-negative; a user whose selected goals all weigh 0 gets them weighted equally
+    goal_weights: Optional[Dict[str, float]] = None
+    goal_order_decay: float = 1.0
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+    
+    def _goal_cols(self) -> List[str]:
+        # Fallback to sorted goals if goal_columns not set (shouldn't happen if model was trained)
+        return self.goal_columns or sorted([f'goal_{g}' for g in self.all_goals])
+    
+    def _resolve_goals(self, selected_goals) -> List[Tuple[str, str]]:
+        """
+        Map goal IDs (frontend or CSV names, or a single goal string) to CSV goals
+        
+        Returns:
+            [(requested ID, CSV goal)] in selection order, unknown and repeated goals dropped
+        """
+        if isinstance(selected_goals, str):
+            selected_goals = [selected_goals]
+        resolved = []
+        seen = set()
+        for goal in selected_goals or []:
+            csv_goal = self.goal_mapping.get(goal, goal if goal in self.all_goals else None)
+            if csv_goal is not None and csv_goal not in seen:
+                seen.add(csv_goal)
+                resolved.append((goal, csv_goal))
+        # Default to stress_relief (frontend ID stress_reduction) if no goals provided
+        return resolved or [('stress_reduction', 'stress_relief')]
+    
+    def _primary_goal(self, selected_goals) -> str:
+        """First known CSV goal of a selection"""
+        return self._resolve_goals(selected_goals)[0][1]
+    
+    def build_feature_matrix(self, age, height, weight, goals) -> np.ndarray:
+        """
+        Build the unscaled feature matrix for many users at once
+        
+        Args:
+            age, height, weight: 1-D array-likes of equal length (height in meters, weight in kg)
+            goals: one entry per user, each a list of goal IDs (frontend or CSV names) or a single goal
+        
+        Returns:
+            float32 array of shape (n_users, n_features), columns in training order
+        """
+        age = np.asarray(age, dtype=np.float64)
+        height = np.asarray(height, dtype=np.float64)
+        weight = np.asarray(weight, dtype=np.float64)
+        
+        # Same column order as training: age, BMI, body_mass, height + goal one-hot
+        goal_cols = self._goal_cols()
+        goal_index = {col: i for i, col in enumerate(goal_cols)}
+        
+        features = np.zeros((len(age), len(NUMERIC_FEATURES) + len(goal_cols)), dtype=np.float32)
+        features[:, 0] = age
+        features[:, 1] = weight / (height ** 2)
+        features[:, 2] = weight
+        features[:, 3] = height
+        
+        goal_positions = np.array(
+            [goal_index.get(f'goal_{self._primary_goal(g)}', -1) for g in goals], dtype=np.int64
+        )
+        rows = np.nonzero(goal_positions >= 0)[0]
+        features[rows, len(NUMERIC_FEATURES) + goal_positions[rows]] = 1.0
+        return features
+    
+    @staticmethod
+    def postprocess(raw: np.ndarray) -> Dict[str, np.ndarray]:
+        """Clamp raw network outputs to safe bounds and round to 0.1"""
+        bounded = np.round(np.clip(np.asarray(raw, dtype=np.float64), OUTPUT_MIN, OUTPUT_MAX), 1)
+        return {name: bounded[:, i] for i, name in enumerate(OUTPUT_NAMES)}
+    
+    def predict_batch(self, age, height, weight, goals, goal_weights: Optional[Dict[str, float]] = None,
+                      per_goal: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Predict optimal sauna settings for many users in one forward pass
+        
+        Every selected goal of every user becomes one row of the same batch; each user's rows are
+        then blended with the goal weights, so the cost is one forward pass however many goals
+        are selected.
+        
+        Args:
+            age, height, weight: 1-D array-likes (height in meters, weight in kg)
+            goals: one list of goal IDs per user
+            goal_weights: per CSV goal weights (non-negative), overriding self.goal_weights
+            per_goal: also return each user's unblended settings per goal
+        
+        Returns:
+            Dictionary of arrays 'temperature', 'humidity', 'session_length', one value per user;
+            with per_goal, 'per_goal' holds one {goal ID: settings dict} per user
+        """
+        age = np.asarray(age, dtype=np.float64)
+        height = np.asarray(height, dtype=np.float64)
+        weight = np.asarray(weight, dtype=np.float64)
+        n_users = len(age)
+        if n_users == 0:
+            result = {name: np.zeros(0) for name in OUTPUT_NAMES}
+            if per_goal:
+                result['per_goal'] = []
+            return result
+        
+        resolved = [self._resolve_goals(g) for g in goals]
+        counts = np.array([len(r) for r in resolved], dtype=np.int64)
+        user = np.repeat(np.arange(n_users), counts)
+        flat = [pair for r in resolved for pair in r]
+        
+        features = self.build_feature_matrix(age[user], height[user], weight[user], [csv for _, csv in flat])
+        raw = np.clip(np.asarray(self._forward(features), dtype=np.float64), OUTPUT_MIN, OUTPUT_MAX)
+        
+        # Blend each user's goal rows: weighted mean by goal weight and selection rank
+        goal_weights = goal_weights if goal_weights is not None else (self.goal_weights or {})
+        if any(weight < 0 for weight in goal_weights.values()):
+            raise ValueError("Goal weights must be non-negative")
+        rank = np.arange(len(user)) - np.repeat(np.cumsum(counts) - counts, counts)
+        order = self.goal_order_decay ** rank
+        weights = np.array([goal_weights.get(csv, 1.0) for _, csv in flat]) * order
+        totals = np.bincount(user, weights=weights, minlength=n_users)
+        unweighted = totals[user] <= 0
+        if unweighted.any():
+            # Every selected goal weighs 0: fall back to equal goal weights rather than divide by zero
+            weights = np.where(unweighted, order, weights)
+            totals = np.bincount(user, weights=weights, minlength=n_users)
+        blended = np.stack(
+            [np.bincount(user, weights=weights * raw[:, i], minlength=n_users) for i in range(raw.shape[1])], axis=1
+        ) / totals[:, None]
+        
+        result = self.postprocess(blended)
+        if per_goal:
+            goal_settings = self.postprocess(raw)
+            result['per_goal'] = [{} for _ in range(n_users)]
+            for row, (goal_id, _) in enumerate(flat):
+                result['per_goal'][user[row]][goal_id] = {
+                    name: float(goal_settings[name][row]) for name in OUTPUT_NAMES
+                }
+        return result
+    
+    def predict_dataframe(self, df):
+        """
+        Predict for a DataFrame with columns age, height (m), weight (kg) and goals
+        (lists of goal IDs, or a 'goal' column with one goal per row)
+        
+        Returns:
+            Copy of df with 'temperature', 'humidity' and 'session_length' columns added
+        """
+        goals = df['goals'] if 'goals' in df.columns else df['goal']
+        predictions = self.predict_batch(df['age'].values, df['height'].values, df['weight'].values, goals.tolist())
+        result = df.copy()
+        for key, values in predictions.items():
+            result[key] = values
+        return result
+    
+    def predict(self, age: float, gender: str, height: float, weight: float, 
+                selected_goals: List[str]) -> Dict[str, float]:
+        """
+        Predict optimal sauna settings for a user
+        
+        Args:
+            age: User's age
+            gender: User's gender (Male, Female, Other, Prefer not to say)
+            height: User's height in meters
+            weight: User's weight in kg
+            selected_goals: List of goal IDs from frontend
+        
+        Returns:
+            Dictionary with the blended 'temperature', 'humidity', 'session_length' and, under
+            'per_goal', the settings for each selected goal
+        """
+        prediction = self.predict_batch([age], [height], [weight], [selected_goals], per_goal=True)
+        result = {name: float(prediction[name][0]) for name in OUTPUT_NAMES}
+        result['per_goal'] = prediction['per_goal'][0]
+        return result
+
+
+def sample_users(n: int, all_goals: List[str], seed: int = 0):
+    """Random users spanning the realistic input space: (age, height m, weight kg, goals)"""
+    rng = np.random.default_rng(seed)
+    age = rng.integers(18, 81, size=n).astype(np.float64)
+    height = rng.uniform(1.50, 2.05, size=n)
+    weight = rng.uniform(45.0, 130.0, size=n)
+    goals = [[goal] for goal in rng.choice(all_goals, size=n)]
+    return age, height, weight, goals
+
+
+def compare_engines(reference: RecommendationPredictor, candidate: RecommendationPredictor,
+                    n_samples: int = 2000, seed: int = 0) -> Dict[str, float]:
+    """
+    Parity check between two engines on random users
+    
+    Returns:
+        Max absolute error per output (before rounding, within the output bounds), and the
+        fraction of users whose rounded recommendation differs
+    """
+    age, height, weight, goals = sample_users(n_samples, reference.all_goals, seed)
+    features = reference.build_feature_matrix(age, height, weight, goals)
+    expected = np.clip(np.asarray(reference._forward(features), dtype=np.float64), OUTPUT_MIN, OUTPUT_MAX)
+    actual = np.clip(np.asarray(candidate._forward(features), dtype=np.float64), OUTPUT_MIN, OUTPUT_MAX)
+    
+    report = {f'max_abs_error_{name}': float(np.max(np.abs(expected[:, i] - actual[:, i])))
+              for i, name in enumerate(OUTPUT_NAMES)}
+    expected_out = reference.postprocess(expected)
+    actual_out = candidate.postprocess(actual)
+    mismatched = np.zeros(n_samples, dtype=bool)
+    for name in OUTPUT_NAMES:
+        mismatched |= expected_out[name] != actual_out[name]
+    report['rounded_mismatch_rate'] = float(mismatched.mean())
+    return report
@@ -0,0 +1,128 @@
+"""
+Precomputed recommendation lookup grid
+Evaluates the network once over a regular (age, height, weight) grid for every goal and
+serves predictions by trilinear interpolation, without any model runtime
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.predictive_model.inference import (
+    RecommendationPredictor, GOAL_MAPPING, NUMERIC_FEATURES, OUTPUT_MIN, OUTPUT_MAX, compare_engines
+)
+
+# (start, stop, step) per axis; inputs outside are clamped to the nearest edge
+AGE_AXIS = (16.0, 90.0, 2.0)        # years
+HEIGHT_AXIS = (1.30, 2.50, 0.02)    # meters
+WEIGHT_AXIS = (35.0, 160.0, 2.5)    # kg
+
+# Outputs are stored as float16 in [-1, 1] relative to their bounds, which keeps the
+# quantisation error under 0.01 (well below the 0.1 rounding of the response)
+_MID = (OUTPUT_MIN + OUTPUT_MAX) / 2.0
+_HALF_RANGE = (OUTPUT_MAX - OUTPUT_MIN) / 2.0
+
+
+def _axis(spec: Tuple[float, float, float]) -> np.ndarray:
+    start, stop, step = spec
+    return np.round(np.arange(start, stop + step / 2.0, step), 6)
+
+
+class RecommendationGrid(RecommendationPredictor):
+    """
+    Lookup-table engine: values[goal, age, height, weight] holds the network's outputs
+    
+    Lookup is O(1) per user: locate the enclosing cell on each axis and blend its 8 corners.
+    Build with RecommendationGrid.build(engine) or load a saved grid with RecommendationGrid(path).
+    """
+    
+    def __init__(self, grid_path: Optional[str] = None):
+        self.values = None
+        self.axes = None
+        self.goal_mapping = dict(GOAL_MAPPING)
+        self.all_goals = []
+        self.goal_columns = None
+        
+        if grid_path and os.path.exists(grid_path):
+            self.load(grid_path)
+    
+    @classmethod
+    def build(cls, engine: RecommendationPredictor, age_axis=AGE_AXIS, height_axis=HEIGHT_AXIS,
+              weight_axis=WEIGHT_AXIS) -> 'RecommendationGrid':
+        """Evaluate engine at every grid point, one batched forward pass per goal"""
+        grid = cls()
+        grid.goal_mapping = dict(engine.goal_mapping)
+        grid.all_goals = list(engine.all_goals)
+        grid.goal_columns = list(engine._goal_cols())
+        grid.axes = (_axis(age_axis), _axis(height_axis), _axis(weight_axis))
+        
+        ages, heights, weights = np.meshgrid(*grid.axes, indexing='ij')
+        shape = ages.shape
+        values = np.empty((len(grid.goal_columns),) + shape + (3,), dtype=np.float16)
+        for g, goal_col in enumerate(grid.goal_columns):
+            goal = goal_col.replace('goal_', '')
+            features = engine.build_feature_matrix(
+                ages.ravel(), heights.ravel(), weights.ravel(), [goal] * ages.size
+            )
+            raw = np.clip(np.asarray(engine._forward(features), dtype=np.float64), OUTPUT_MIN, OUTPUT_MAX)
+            values[g] = ((raw - _MID) / _HALF_RANGE).reshape(shape + (3,)).astype(np.float16)
+        grid.values = values
+        print(f"Recommendation grid built: {values.shape[:-1]} points, {values.nbytes / 1e6:.1f} MB")
+        return grid
+    
+    def save(self, grid_path: str):
+        np.savez(
+            grid_path,
+            values=self.values,
+            age_axis=self.axes[0], height_axis=self.axes[1], weight_axis=self.axes[2],
+            goal_columns=np.array(self.goal_columns),
+            all_goals=np.array(self.all_goals),
+            goal_mapping_keys=np.array(list(self.goal_mapping.keys())),
+            goal_mapping_values=np.array(list(self.goal_mapping.values())),
+        )
+        print(f"Recommendation grid saved to {grid_path}")
+    
+    def load(self, grid_path: str):
+        with np.load(grid_path, allow_pickle=False) as data:
+            self.values = data['values']
+            self.axes = (data['age_axis'], data['height_axis'], data['weight_axis'])
+            self.goal_columns = [str(col) for col in data['goal_columns']]
+            self.all_goals = [str(goal) for goal in data['all_goals']]
+            self.goal_mapping = dict(zip((str(k) for k in data['goal_mapping_keys']),
+                                         (str(v) for v in data['goal_mapping_values'])))
+        print(f"Recommendation grid loaded from {grid_path}")
+    
+    def _cell(self, axis: np.ndarray, x: np.ndarray):
+        """Lower corner index and fractional position of each x within its cell (clamped to the axis)"""
+        x = np.clip(x, axis[0], axis[-1])
+        step = axis[1] - axis[0]
+        position = (x - axis[0]) / step
+        lower = np.minimum(position.astype(np.int64), len(axis) - 2)
+        return lower, (position - lower)[:, None]
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        """Interpolated raw outputs for a feature matrix in the network's column layout"""
+        if self.values is None:
+            raise ValueError("Grid not built. Please build or load a grid first.")
+        
+        features = np.asarray(features, dtype=np.float64)
+        n_numeric = len(NUMERIC_FEATURES)
+        goal = np.argmax(features[:, n_numeric:], axis=1)
+        a, fa = self._cell(self.axes[0], features[:, 0])
+        h, fh = self._cell(self.axes[1], features[:, 3])
+        w, fw = self._cell(self.axes[2], features[:, 2])
+        
+        v = self.values
+        c00 = v[goal, a, h, w] * (1 - fw) + v[goal, a, h, w + 1] * fw
+        c01 = v[goal, a, h + 1, w] * (1 - fw) + v[goal, a, h + 1, w + 1] * fw
+        c10 = v[goal, a + 1, h, w] * (1 - fw) + v[goal, a + 1, h, w + 1] * fw
+        c11 = v[goal, a + 1, h + 1, w] * (1 - fw) + v[goal, a + 1, h + 1, w + 1] * fw
+        c0 = c00 * (1 - fh) + c01 * fh
+        c1 = c10 * (1 - fh) + c11 * fh
+        normalized = c0 * (1 - fa) + c1 * fa
+        return normalized * _HALF_RANGE + _MID
+    
+    def error_report(self, engine: RecommendationPredictor, n_samples: int = 20000) -> Dict[str, float]:
+        """Max interpolation error against the network on random in-range users"""
+        return compare_engines(engine, self, n_samples=n_samples)
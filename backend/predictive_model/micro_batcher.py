@@ -0,0 +1,136 @@
+"""
+In-process micro-batching for model inference
+Collects concurrent single-item requests into one batched call
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Queues items from many callers and runs them through batch_fn together.
+    
+    A batch is dispatched when max_batch_size items are queued or max_wait_ms has passed since
+    its first item arrived, whichever comes first. Larger batches and longer waits raise
+    throughput under load; a shorter wait bounds the latency added to a lone request.
+    If a batch fails, its items are retried one at a time, so one bad item only fails its own
+    caller.
+    
+    Args:
+        batch_fn: callable(list of items) -> list of results, in the same order (exactly one per item)
+        max_batch_size: most items per batch_fn call
+        max_wait_ms: longest time the first item of a batch waits for company
+    """
+    
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, name: str = "micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.retried_batches = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+    
+    def submit(self, item) -> Future:
+        """Queue one item; the returned future resolves to its result (or exception)"""
+        future = Future()
+        # Under the lock so nothing can be queued behind the stop marker, where it would never run
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Micro-batcher is closed")
+            self._queue.put((item, future))
+        return future
+    
+    def __call__(self, item):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(item).result()
+    
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                # Finish this batch, then let _run see the stop marker
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+    
+    def _call_batch_fn(self, items):
+        results = list(self.batch_fn(items))
+        if len(results) != len(items):
+            raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+        return results
+    
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [(item, future) for item, future in self._collect(entry)
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            
+            try:
+                results = self._call_batch_fn([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Isolate the failing item(s): every caller gets its own result or exception
+                with self._lock:
+                    self.retried_batches += 1
+                for item, future in batch:
+                    try:
+                        future.set_result(self._call_batch_fn([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+    
+    def close(self, timeout: float = 5.0):
+        """Stop the worker after the already-queued items are processed; later submits raise"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size_seen": self.max_batch_seen,
+                "retried_batches": self.retried_batches,
+                "queued": self._queue.qsize(),
+            }
@@ -13,9 +13,16 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 import pickle
+import copy
+import io
+import json
 import os
+import threading
+import time
 from typing import Dict, List, Tuple, Optional
 import warnings
+
+from backend.predictive_model.inference import RecommendationPredictor, GOAL_MAPPING
 warnings.filterwarnings('ignore')
 
 
@@ -59,24 +66,94 @@ class SaunaRecommendationModel(nn.Module):
         return self.network(x)
 
 
-class SaunaRecommendationEngine:
+class ScaledSaunaModel(nn.Module):
+    """Feature scaling + network in one module, so exported graphs take unscaled features"""
+    
+    def __init__(self, network: nn.Module, mean: np.ndarray, scale: np.ndarray):
+        super(ScaledSaunaModel, self).__init__()
+        self.network = network
+        self.register_buffer('mean', torch.tensor(mean, dtype=torch.float32))
+        self.register_buffer('scale', torch.tensor(scale, dtype=torch.float32))
+    
+    def forward(self, x):
+        return self.network((x - self.mean) / self.scale)
+
+
+def quantize_dynamic_model(model: nn.Module) -> nn.Module:
+    """int8 dynamic quantization of the Linear layers (weights int8, activations quantized per batch); CPU only"""
+    model = copy.deepcopy(model).cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def serialized_size(model: nn.Module) -> int:
+    """Bytes of the model's state_dict as torch.save writes it"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+class InferenceSession:
+    """
+    Torch inference state prepared once per loaded model
+    
+    The device is fixed, the model is in eval mode with gradients disabled, feature scaling
+    runs as tensor ops, and inputs are copied into a preallocated buffer, so a call does no
+    device moves, mode switches or sklearn validation. A lock serialises calls, which also keeps
+    concurrent requests from oversubscribing the intra-op thread pool.
+    """
+    
+    def __init__(self, model: nn.Module, scaler: StandardScaler, device: Optional[str] = None,
+                 num_threads: Optional[int] = None, max_batch_size: int = 256, warmup: bool = True):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.model = model.to(self.device).eval()
+        for parameter in self.model.parameters():
+            parameter.requires_grad_(False)
+        
+        n_features = scaler.n_features_in_
+        with torch.inference_mode():
+            self.mean = torch.as_tensor(scaler.mean_, dtype=torch.float32, device=self.device)
+            self.scale = torch.as_tensor(scaler.scale_, dtype=torch.float32, device=self.device)
+            self._buffer = torch.empty((max_batch_size, n_features), dtype=torch.float32, device=self.device)
+        self._lock = threading.Lock()
+        
+        if warmup:
+            # First calls pay for allocator and kernel setup; take that hit at load time
+            for n in (1, max_batch_size):
+                self.run(np.zeros((n, n_features), dtype=np.float32))
+    
+    def run(self, features: np.ndarray) -> np.ndarray:
+        """Unscaled feature matrix -> raw network outputs"""
+        features = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+        with self._lock, torch.inference_mode():
+            if len(features) <= len(self._buffer):
+                batch = self._buffer[:len(features)]
+                batch.copy_(features)
+                batch.sub_(self.mean).div_(self.scale)
+            else:
+                batch = (features.to(self.device) - self.mean) / self.scale
+            return self.model(batch).cpu().numpy()
+
+
+class SaunaRecommendationEngine(RecommendationPredictor):
     """Main engine for sauna recommendations using neural network"""
     
-    def __init__(self, model_path: Optional[str] = None, scaler_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, scaler_path: Optional[str] = None,
+                 device: Optional[str] = None, num_threads: Optional[int] = None, quantize: bool = False):
         self.model = None
+        self.session = None
+        # Inference session settings (device None picks CUDA when available)
+        self.device = device
+        self.num_threads = num_threads
+        # Serve an int8 dynamically quantized copy of the model (CPU only)
+        self.quantize = quantize
         self.scaler = StandardScaler()
         self.goal_encoder = LabelEncoder()
         self.gender_encoder = LabelEncoder()
         
         # Goal mapping from frontend to CSV
-        self.goal_mapping = {
-            'stress_reduction': 'stress_relief',
-            'improving_sleep_quality': 'sleep_quality',
-            'cardiovascular_health': 'cardiovascular_health',
-            'muscle_recovery': 'muscle_recovery',
-            'longevity': 'longevity',
-            'cold_recovery': 'cold_recovery',
-        }
+        self.goal_mapping = dict(GOAL_MAPPING)
         
         # Reverse mapping
         self.reverse_goal_mapping = {v: k for k, v in self.goal_mapping.items()}
@@ -88,6 +165,10 @@ class SaunaRecommendationEngine:
         # Goal columns order (will be set during training)
         self.goal_columns = None
         
+        # Network architecture (set by train, saved with the encoders)
+        self.hidden_sizes = [128, 64, 32]
+        self.dropout_rate = 0.3
+        
         self.model_path = model_path or 'sauna_recommendation_model.pth'
         self.scaler_path = scaler_path or 'sauna_scaler.pkl'
         
@@ -133,11 +214,34 @@ class SaunaRecommendationEngine:
         
         return features, targets
     
+    @staticmethod
+    def split_data(features: np.ndarray, targets: np.ndarray, test_size: float = 0.2,
+                   validation_size: float = 0.1) -> Tuple[np.ndarray, ...]:
+        """Deterministic train / validation / test split; returns X_train, X_val, X_test, y_train, y_val, y_test"""
+        X_train, X_temp, y_train, y_temp = train_test_split(
+            features, targets, test_size=(test_size + validation_size), random_state=42
+        )
+        
+        val_size_adjusted = validation_size / (test_size + validation_size)
+        X_val, X_test, y_val, y_test = train_test_split(
+            X_temp, y_temp, test_size=(1 - val_size_adjusted), random_state=42
+        )
+        return X_train, X_val, X_test, y_train, y_val, y_test
+    
     def train(self, csv_path: str, epochs: int = 100, batch_size: int = 32, 
               learning_rate: float = 0.001, test_size: float = 0.2, 
-              validation_size: float = 0.1, save_model: bool = True, ):
+              validation_size: float = 0.1, save_model: bool = True, fast: bool = False,
+              hidden_sizes: Optional[List[int]] = None, dropout_rate: Optional[float] = None,
+              patience: int = 20):
         """
         Train the neural network model
+        
+        hidden_sizes / dropout_rate override the architecture; training stops after `patience`
+        epochs without a validation improvement, and the best epoch is what gets saved
+        
+        With fast=True the splits live on the device as contiguous tensors: each epoch shuffles
+        with one permutation, batches are slices of it, and validation / test run as a single
+        forward pass, instead of going through DataLoader indexing and collation per batch
         """
         print("Loading data...")
         df = self.load_data(csv_path)
@@ -147,13 +251,8 @@ class SaunaRecommendationEngine:
         features, targets = self.prepare_features(df)
         
         # Split data: train -> validation -> test
-        X_train, X_temp, y_train, y_temp = train_test_split(
-            features, targets, test_size=(test_size + validation_size), random_state=42
-        )
-        
-        val_size_adjusted = validation_size / (test_size + validation_size)
-        X_val, X_test, y_val, y_test = train_test_split(
-            X_temp, y_temp, test_size=(1 - val_size_adjusted), random_state=42
+        X_train, X_val, X_test, y_train, y_val, y_test = self.split_data(
+            features, targets, test_size, validation_size
         )
         
         print(f"Train samples: {len(X_train)}")
@@ -166,7 +265,7 @@ class SaunaRecommendationEngine:
         X_val_scaled = self.scaler.transform(X_val)
         X_test_scaled = self.scaler.transform(X_test)
         
-        # Create datasets and data loaders
+        # Create datasets and data loaders (the fast path uses tensors instead, below)
         train_dataset = SaunaDataset(X_train_scaled, y_train)
         val_dataset = SaunaDataset(X_val_scaled, y_val)
         test_dataset = SaunaDataset(X_test_scaled, y_test)
@@ -177,7 +276,13 @@ class SaunaRecommendationEngine:
         
         # Initialize model
         input_size = features.shape[1]
-        self.model = SaunaRecommendationModel(input_size=input_size)
+        if hidden_sizes is not None:
+            self.hidden_sizes = list(hidden_sizes)
+        if dropout_rate is not None:
+            self.dropout_rate = dropout_rate
+        self.model = SaunaRecommendationModel(input_size=input_size, hidden_sizes=self.hidden_sizes,
+                                              dropout_rate=self.dropout_rate)
+        self.session = None
         
         # Loss and optimizer
         criterion = nn.MSELoss()
@@ -189,41 +294,42 @@ class SaunaRecommendationEngine:
         self.model.to(device)
         print(f"Using device: {device}")
         
+        if fast:
+            X_train_t, y_train_t = self._to_tensors(X_train_scaled, y_train, device)
+            X_val_t, y_val_t = self._to_tensors(X_val_scaled, y_val, device)
+            X_test_t, y_test_t = self._to_tensors(X_test_scaled, y_test, device)
+        
         best_val_loss = float('inf')
         patience_counter = 0
-        patience = 20
         
-        print("\nStarting training...")
+        print(f"\nStarting training{' (fast tensor loop)' if fast else ''}...")
+        started = time.perf_counter()
+        epochs_run = 0
         for epoch in range(epochs):
+            epochs_run += 1
             # Training
             self.model.train()
-            train_loss = 0.0
-            for batch_features, batch_targets in train_loader:
-                batch_features = batch_features.to(device)
-                batch_targets = batch_targets.to(device)
-                
-                optimizer.zero_grad()
-                outputs = self.model(batch_features)
-                loss = criterion(outputs, batch_targets)
-                loss.backward()
-                optimizer.step()
-                
-                train_loss += loss.item()
+            if fast:
+                train_loss = self._train_epoch_tensors(X_train_t, y_train_t, batch_size, criterion, optimizer)
+            else:
+                train_loss = self._train_epoch_loader(train_loader, device, criterion, optimizer)
             
             # Validation
             self.model.eval()
-            val_loss = 0.0
-            with torch.no_grad():
-                for batch_features, batch_targets in val_loader:
-                    batch_features = batch_features.to(device)
-                    batch_targets = batch_targets.to(device)
-                    
-                    outputs = self.model(batch_features)
-                    loss = criterion(outputs, batch_targets)
-                    val_loss += loss.item()
-            
-            train_loss /= len(train_loader)
-            val_loss /= len(val_loader)
+            if fast:
+                with torch.no_grad():
+                    val_loss = criterion(self.model(X_val_t), y_val_t).item()
+            else:
+                val_loss = 0.0
+                with torch.no_grad():
+                    for batch_features, batch_targets in val_loader:
+                        batch_features = batch_features.to(device)
+                        batch_targets = batch_targets.to(device)
+                        
+                        outputs = self.model(batch_features)
+                        loss = criterion(outputs, batch_targets)
+                        val_loss += loss.item()
+                val_loss /= len(val_loader)
             
             scheduler.step(val_loss)
             
@@ -243,28 +349,37 @@ class SaunaRecommendationEngine:
                 print(f"Early stopping at epoch {epoch+1}")
                 break
         
+        epochs_per_sec = epochs_run / (time.perf_counter() - started)
+        print(f"Trained {epochs_run} epochs at {epochs_per_sec:.2f} epochs/sec")
+        
         # Test evaluation
         print("\nEvaluating on test set...")
         self.model.eval()
-        test_loss = 0.0
-        predictions = []
-        actuals = []
         
         with torch.no_grad():
-            for batch_features, batch_targets in test_loader:
-                batch_features = batch_features.to(device)
-                batch_targets = batch_targets.to(device)
-                
-                outputs = self.model(batch_features)
-                loss = criterion(outputs, batch_targets)
-                test_loss += loss.item()
+            if fast:
+                outputs = self.model(X_test_t)
+                test_loss = criterion(outputs, y_test_t).item()
+                predictions = outputs.cpu().numpy()
+                actuals = y_test_t.cpu().numpy()
+            else:
+                test_loss = 0.0
+                predictions = []
+                actuals = []
+                for batch_features, batch_targets in test_loader:
+                    batch_features = batch_features.to(device)
+                    batch_targets = batch_targets.to(device)
+                    
+                    outputs = self.model(batch_features)
+                    loss = criterion(outputs, batch_targets)
+                    test_loss += loss.item()
+                    
+                    predictions.append(outputs.cpu().numpy())
+                    actuals.append(batch_targets.cpu().numpy())
                 
-                predictions.append(outputs.cpu().numpy())
-                actuals.append(batch_targets.cpu().numpy())
-        
-        test_loss /= len(test_loader)
-        predictions = np.vstack(predictions)
-        actuals = np.vstack(actuals)
+                test_loss /= len(test_loader)
+                predictions = np.vstack(predictions)
+                actuals = np.vstack(actuals)
         
         # Calculate metrics
         mae_temp = np.mean(np.abs(predictions[:, 0] - actuals[:, 0]))
@@ -281,99 +396,220 @@ class SaunaRecommendationEngine:
             'test_loss': test_loss,
             'mae_temp': mae_temp,
             'mae_humidity': mae_humidity,
-            'mae_session': mae_session
+            'mae_session': mae_session,
+            'best_val_loss': best_val_loss,
+            'epochs': epochs_run,
+            'epochs_per_sec': epochs_per_sec
         }
     
-    def predict(self, age: float, gender: str, height: float, weight: float, 
-                selected_goals: List[str]) -> Dict[str, float]:
-        """
-        Predict optimal sauna settings for a user
-        
-        Args:
-            age: User's age
-            gender: User's gender (Male, Female, Other, Prefer not to say)
-            height: User's height in meters
-            weight: User's weight in kg
-            selected_goals: List of goal IDs from frontend
+    @staticmethod
+    def _to_tensors(features: np.ndarray, targets: np.ndarray, device: torch.device) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Contiguous float32 tensors on device, copied once per training run"""
+        return (torch.as_tensor(np.ascontiguousarray(features, dtype=np.float32), device=device),
+                torch.as_tensor(np.ascontiguousarray(targets, dtype=np.float32), device=device))
+    
+    def _train_epoch_loader(self, loader: DataLoader, device: torch.device, criterion, optimizer) -> float:
+        """One epoch over a DataLoader; returns the mean batch loss"""
+        train_loss = 0.0
+        for batch_features, batch_targets in loader:
+            batch_features = batch_features.to(device)
+            batch_targets = batch_targets.to(device)
+            
+            optimizer.zero_grad()
+            outputs = self.model(batch_features)
+            loss = criterion(outputs, batch_targets)
+            loss.backward()
+            optimizer.step()
+            
+            train_loss += loss.item()
+        return train_loss / len(loader)
+    
+    def _train_epoch_tensors(self, features: torch.Tensor, targets: torch.Tensor, batch_size: int,
+                             criterion, optimizer) -> float:
+        """One epoch over in-memory tensors; returns the mean batch loss"""
+        # One gather per epoch; every batch below is then a contiguous view of it
+        permutation = torch.randperm(len(features), device=features.device)
+        features, targets = features[permutation], targets[permutation]
+        
+        # Accumulate on the device so the loop never waits on .item()
+        # BatchNorm cannot train on a single row, so a trailing batch of one joins the previous batch
+        ends = list(range(batch_size, len(features), batch_size)) + [len(features)]
+        if len(ends) > 1 and ends[-1] - ends[-2] == 1:
+            ends.pop(-2)
+        
+        train_loss = torch.zeros((), device=features.device)
+        n_batches = 0
+        start = 0
+        for end in ends:
+            batch_features = features[start:end]
+            batch_targets = targets[start:end]
+            start = end
+            
+            optimizer.zero_grad(set_to_none=True)
+            loss = criterion(self.model(batch_features), batch_targets)
+            loss.backward()
+            optimizer.step()
+            
+            train_loss += loss.detach()
+            n_batches += 1
+        return train_loss.item() / n_batches
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        """Scale the feature matrix and run it through the network; returns raw outputs"""
+        if self.model is None:
+            raise ValueError("Model not loaded. Please train or load a model first.")
         
-        Returns:
-            Dictionary with 'temperature', 'humidity', 'session_length'
-        """
+        if self.session is None:
+            self.session = InferenceSession(self.model, self.scaler, device=self.device, num_threads=self.num_threads)
+        return self.session.run(features)
+    
+    def quantized_copy(self) -> 'SaunaRecommendationEngine':
+        """Engine sharing this one's scaler and goal metadata, serving an int8 quantized model"""
         if self.model is None:
             raise ValueError("Model not loaded. Please train or load a model first.")
+        quantized = copy.copy(self)
+        quantized.model = quantize_dynamic_model(self.model)
+        quantized.device = 'cpu'
+        quantized.quantize = True
+        quantized.session = None
+        return quantized
+    
+    def quantization_report(self, csv_path: str, test_size: float = 0.2, validation_size: float = 0.1) -> Dict:
+        """
+        Compare the float model with its int8 dynamically quantized copy
         
-        # Calculate BMI
-        bmi = weight / (height ** 2)
-        
-        # Map frontend goals to CSV goals
-        csv_goals = []
-        for goal in selected_goals:
-            if goal in self.goal_mapping:
-                csv_goals.append(self.goal_mapping[goal])
-            elif goal in self.all_goals:
-                csv_goals.append(goal)
-        
-        # If multiple goals, we'll use the first one for now
-        # Future enhancement: could average predictions or use multi-goal encoding
-        if not csv_goals:
-            # Default to stress_relief if no goals provided
-            csv_goals = ['stress_relief']
-        
-        primary_goal = csv_goals[0]
-        
-        # Create one-hot encoding for goals using the same column order as training
-        if self.goal_columns is None:
-            # Fallback to sorted goals if goal_columns not set (shouldn't happen if model was trained)
-            goal_cols = sorted([f'goal_{g}' for g in self.all_goals])
-        else:
-            goal_cols = self.goal_columns
-        
-        # Create feature vector in the same order as training
-        feature_order = ['age', 'BMI', 'body_mass', 'height'] + goal_cols
-        
-        # Build feature dict with all goals set to 0, then set the primary goal to 1
-        feature_dict = {
-            'age': age,
-            'BMI': bmi,
-            'body_mass': weight,
-            'height': height
+        Accuracy is measured on the same held-out test split train() uses; latency with the
+        startup latency probe; size as the serialized state_dict
+        """
+        from backend.predictive_model.runtimes import measure_latency
+        
+        if self.quantize:
+            raise ValueError("Quantization report needs the float model; load it with quantize=False.")
+        
+        features, targets = self.prepare_features(self.load_data(csv_path))
+        _, _, X_test, _, _, y_test = self.split_data(features, targets, test_size, validation_size)
+        X_test = X_test.astype(np.float32)
+        
+        quantized = self.quantized_copy()
+        report = {}
+        for name, engine in (('float32', self), ('int8', quantized)):
+            predictions = engine._forward(X_test)
+            mae = np.mean(np.abs(predictions - y_test), axis=0)
+            report[name] = {
+                'mae_temp': float(mae[0]),
+                'mae_humidity': float(mae[1]),
+                'mae_session': float(mae[2]),
+                'model_bytes': serialized_size(engine.model),
+                **measure_latency(engine),
+            }
+        
+        drift = np.mean(np.abs(quantized._forward(X_test) - self._forward(X_test)), axis=0)
+        report['int8_vs_float32_mae'] = {
+            'temperature': float(drift[0]), 'humidity': float(drift[1]), 'session_length': float(drift[2])
         }
+        report['test_samples'] = len(X_test)
+        return report
+    
+    def fold_layers(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Collapse scaler + network into plain affine layers for inference
         
-        # Initialize all goal columns to 0
-        for goal_col in goal_cols:
-            feature_dict[goal_col] = 0.0
-        
-        # Set the primary goal to 1
-        primary_goal_col = f'goal_{primary_goal}'
-        if primary_goal_col in feature_dict:
-            feature_dict[primary_goal_col] = 1.0
-        
-        # Create feature array in the correct order
-        features = np.array([[feature_dict[col] for col in feature_order]], dtype=np.float32)
-        
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Predict
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model.to(device)
-        self.model.eval()
+        Each eval-mode BatchNorm follows a ReLU, so it cannot fold into the Linear before it;
+        it is an affine map h * s + t, which folds into the next Linear instead:
+        W (h * s + t) + b = (W * s) h + (W t + b). The StandardScaler folds into the first
+        Linear the same way. Dropout is the identity at inference. The result is evaluated as
+        x @ W.T + b per layer, with ReLU between layers.
         
-        with torch.no_grad():
-            features_tensor = torch.FloatTensor(features_scaled).to(device)
-            prediction = self.model(features_tensor)
-            prediction = prediction.cpu().numpy()[0]
-        
-        # Ensure reasonable bounds
-        temperature = max(60, min(100, prediction[0]))  # 60-100°C
-        humidity = max(5, min(25, prediction[1]))       # 5-25%
-        session_length = max(10, min(30, prediction[2])) # 10-30 minutes
+        Returns:
+            [(weight (out, in), bias (out,))] as float64
+        """
+        if self.model is None:
+            raise ValueError("No model to export")
         
-        return {
-            'temperature': round(temperature, 1),
-            'humidity': round(humidity, 1),
-            'session_length': round(session_length, 1)
-        }
+        # Scaler: (x - mean) / scale
+        scale = 1.0 / self.scaler.scale_
+        shift = -self.scaler.mean_ * scale
+        pending = (scale, shift)
+        layers = []
+        relu_seen = False
+        for module in self.model.network:
+            if isinstance(module, nn.Linear):
+                if layers and not relu_seen:
+                    raise ValueError("Expected ReLU between Linear layers")
+                weight = module.weight.detach().cpu().double().numpy()
+                bias = module.bias.detach().cpu().double().numpy()
+                if pending is not None:
+                    scale, shift = pending
+                    bias = bias + weight @ shift
+                    weight = weight * scale[None, :]
+                    pending = None
+                layers.append((weight, bias))
+                relu_seen = False
+            elif isinstance(module, nn.ReLU):
+                relu_seen = True
+            elif isinstance(module, nn.BatchNorm1d):
+                if not relu_seen or pending is not None:
+                    raise ValueError("Expected BatchNorm1d right after Linear + ReLU")
+                scale = (module.weight.detach().cpu().double().numpy()
+                         / np.sqrt(module.running_var.cpu().double().numpy() + module.eps))
+                shift = module.bias.detach().cpu().double().numpy() - module.running_mean.cpu().double().numpy() * scale
+                pending = (scale, shift)
+            elif not isinstance(module, nn.Dropout):
+                raise ValueError(f"Cannot fold layer {type(module).__name__}")
+        
+        if pending is not None:
+            raise ValueError("Network must end with a Linear layer")
+        return layers
+    
+    def export_numpy(self, npz_path: str):
+        """Save the folded network plus goal metadata as a pickle-free .npz for NumpyRecommendationEngine"""
+        arrays = {}
+        for i, (weight, bias) in enumerate(self.fold_layers()):
+            arrays[f'weight_{i}'] = weight.T.astype(np.float32)  # stored (in, out) for x @ W
+            arrays[f'bias_{i}'] = bias.astype(np.float32)
+        np.savez(
+            npz_path,
+            goal_columns=np.array(self._goal_cols()),
+            all_goals=np.array(self.all_goals),
+            goal_mapping_keys=np.array(list(self.goal_mapping.keys())),
+            goal_mapping_values=np.array(list(self.goal_mapping.values())),
+            **arrays
+        )
+        print(f"NumPy model exported to {npz_path}")
+    
+    def _serving_module(self) -> ScaledSaunaModel:
+        if self.model is None:
+            raise ValueError("No model to export")
+        network = copy.deepcopy(self.model).cpu().eval()
+        return ScaledSaunaModel(network, self.scaler.mean_, self.scaler.scale_).eval()
+    
+    def export_metadata(self, meta_path: str):
+        """Goal metadata needed to build features for the TorchScript / ONNX artifacts"""
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'goal_columns': self._goal_cols(),
+                'all_goals': self.all_goals,
+                'goal_mapping': self.goal_mapping,
+            }, f, indent=2)
+    
+    def export_torchscript(self, model_path: str):
+        """Save the scaler + network as a TorchScript module"""
+        scripted = torch.jit.script(self._serving_module())
+        scripted = torch.jit.freeze(scripted)
+        scripted.save(model_path)
+        print(f"TorchScript model exported to {model_path}")
+    
+    def export_onnx(self, model_path: str):
+        """Save the scaler + network as an ONNX graph with a dynamic batch dimension"""
+        module = self._serving_module()
+        example = torch.zeros(1, self.scaler.n_features_in_, dtype=torch.float32)
+        torch.onnx.export(
+            module, example, model_path,
+            input_names=['features'], output_names=['settings'],
+            dynamic_axes={'features': {0: 'batch'}, 'settings': {0: 'batch'}},
+            opset_version=17,
+        )
+        print(f"ONNX model exported to {model_path}")
     
     def save_model(self, model_path: str, scaler_path: str):
         """Save model and scaler"""
@@ -392,7 +628,9 @@ class SaunaRecommendationEngine:
                 'goal_encoder': self.goal_encoder,
                 'goal_mapping': self.goal_mapping,
                 'all_goals': self.all_goals,
-                'goal_columns': self.goal_columns
+                'goal_columns': self.goal_columns,
+                'hidden_sizes': self.hidden_sizes,
+                'dropout_rate': self.dropout_rate
             }, f)
         
         print(f"Model saved to {model_path}")
@@ -419,6 +657,9 @@ class SaunaRecommendationEngine:
                 self.goal_mapping = encoders.get('goal_mapping', self.goal_mapping)
                 self.all_goals = encoders.get('all_goals', self.all_goals)
                 self.goal_columns = encoders.get('goal_columns', None)
+                # Older saves predate configurable architectures and use the defaults
+                self.hidden_sizes = encoders.get('hidden_sizes', self.hidden_sizes)
+                self.dropout_rate = encoders.get('dropout_rate', self.dropout_rate)
                 
                 # If goal_columns not saved, reconstruct from all_goals
                 if self.goal_columns is None:
@@ -428,10 +669,19 @@ class SaunaRecommendationEngine:
         input_size = self.scaler.n_features_in_
         
         # Initialize and load model
-        self.model = SaunaRecommendationModel(input_size=input_size)
+        self.model = SaunaRecommendationModel(input_size=input_size, hidden_sizes=self.hidden_sizes,
+                                              dropout_rate=self.dropout_rate)
         self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
         self.model.eval()
         
+        if self.quantize:
+            self.model = quantize_dynamic_model(self.model)
+            self.device = 'cpu'
+            print("Model quantized to int8 (dynamic, Linear layers)")
+        
+        # Prepare (and warm up) inference once, instead of on every predict call
+        self.session = InferenceSession(self.model, self.scaler, device=self.device, num_threads=self.num_threads)
+        
         print(f"Model loaded from {model_path}")
 
 
@@ -0,0 +1,56 @@
+"""
+Torch-free inference for the sauna recommendation MLP
+Loads the folded network written by SaunaRecommendationEngine.export_numpy and runs it
+with plain NumPy matrix products
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+from backend.predictive_model.inference import RecommendationPredictor
+
+
+class NumpyRecommendationEngine(RecommendationPredictor):
+    """Recommendation engine backed by a folded .npz network; needs neither torch nor sklearn"""
+    
+    def __init__(self, npz_path: Optional[str] = None):
+        self.weights = []
+        self.biases = []
+        self.goal_mapping = {}
+        self.all_goals = []
+        self.goal_columns = None
+        
+        if npz_path and os.path.exists(npz_path):
+            self.load_model(npz_path)
+    
+    def load_model(self, npz_path: str):
+        """Load folded layers and goal metadata"""
+        if not os.path.exists(npz_path):
+            raise FileNotFoundError(f"Model file not found: {npz_path}")
+        
+        with np.load(npz_path, allow_pickle=False) as data:
+            n_layers = sum(1 for key in data.files if key.startswith('weight_'))
+            # Contiguous float32 so each layer is a single BLAS call
+            self.weights = [np.ascontiguousarray(data[f'weight_{i}'], dtype=np.float32) for i in range(n_layers)]
+            self.biases = [np.ascontiguousarray(data[f'bias_{i}'], dtype=np.float32) for i in range(n_layers)]
+            self.goal_columns = [str(col) for col in data['goal_columns']]
+            self.all_goals = [str(goal) for goal in data['all_goals']]
+            self.goal_mapping = dict(zip((str(k) for k in data['goal_mapping_keys']),
+                                         (str(v) for v in data['goal_mapping_values'])))
+        
+        print(f"NumPy model loaded from {npz_path}")
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        if not self.weights:
+            raise ValueError("Model not loaded. Please export or load a model first.")
+        
+        hidden = np.asarray(features, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            hidden = hidden @ weight
+            hidden += bias
+            if i < last:
+                np.maximum(hidden, 0.0, out=hidden)
+        return hidden
@@ -0,0 +1,46 @@
+"""
+Compare the trained sauna recommendation model with its int8 dynamically quantized copy
+Reports MAE on the held-out test split used in training, the drift between the two models,
+latency and serialized size
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+def main():
+    """Run the quantization report for the model next to this script"""
+    from backend.predictive_model.neural_network import SaunaRecommendationEngine
+    
+    script_dir = Path(__file__).parent
+    model_path = script_dir / "sauna_recommendation_model.pth"
+    scaler_path = script_dir / "sauna_scaler.pkl"
+    csv_path = script_dir / "optimal_sauna_settings_with_height.csv"
+    
+    if not model_path.exists() or not scaler_path.exists():
+        print(f"Error: trained model not found at {model_path}")
+        print("Please run train_model.py first")
+        return 1
+    
+    engine = SaunaRecommendationEngine(model_path=str(model_path), scaler_path=str(scaler_path), device='cpu')
+    report = engine.quantization_report(str(csv_path))
+    
+    print(f"\nQuantization report ({report['test_samples']} test samples):")
+    for name in ('float32', 'int8'):
+        metrics = report[name]
+        print(f"  {name}:")
+        print(f"    - MAE temperature: {metrics['mae_temp']:.3f} °C")
+        print(f"    - MAE humidity: {metrics['mae_humidity']:.3f} %")
+        print(f"    - MAE session length: {metrics['mae_session']:.3f} min")
+        print(f"    - Latency p50: {metrics['single_p50_ms']:.3f} ms single, {metrics['batch64_p50_ms']:.3f} ms batch of 64")
+        print(f"    - Size: {metrics['model_bytes'] / 1024:.1f} KiB")
+    print(f"  int8 vs float32 MAE: {json.dumps(report['int8_vs_float32_mae'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
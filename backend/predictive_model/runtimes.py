@@ -0,0 +1,93 @@
+"""
+Alternative inference runtimes for the sauna recommendation model
+TorchScript and ONNX Runtime engines over the artifacts written by export_model.py,
+plus runtime selection and a latency probe used at API startup
+"""
+
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.predictive_model.inference import RecommendationPredictor, GOAL_MAPPING, sample_users
+
+RUNTIMES = ('torch', 'torchscript', 'onnx', 'numpy')
+
+
+def load_metadata(meta_path: str) -> Dict:
+    """Goal metadata written next to the TorchScript / ONNX artifacts"""
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f"Model metadata not found: {meta_path}")
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class _ExportedModelEngine(RecommendationPredictor):
+    """Engine whose exported graph takes unscaled features (the scaler is part of the graph)"""
+    
+    def __init__(self, meta_path: str):
+        meta = load_metadata(meta_path)
+        self.goal_mapping = meta.get('goal_mapping', dict(GOAL_MAPPING))
+        self.all_goals = meta['all_goals']
+        self.goal_columns = meta['goal_columns']
+
+
+class TorchScriptRecommendationEngine(_ExportedModelEngine):
+    """Runs the scripted model; needs torch but none of the Python model code"""
+    
+    def __init__(self, model_path: str, meta_path: str, num_threads: Optional[int] = None):
+        super().__init__(meta_path)
+        import torch
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self._torch = torch
+        self.model = torch.jit.load(model_path, map_location='cpu')
+        self.model.eval()
+        print(f"TorchScript model loaded from {model_path}")
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        with self._torch.inference_mode():
+            return self.model(self._torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))).numpy()
+
+
+class OnnxRecommendationEngine(_ExportedModelEngine):
+    """Runs the ONNX graph on ONNX Runtime's CPU provider"""
+    
+    def __init__(self, model_path: str, meta_path: str, num_threads: Optional[int] = None):
+        super().__init__(meta_path)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        print(f"ONNX model loaded from {model_path}")
+    
+    def _forward(self, features: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(features, dtype=np.float32)})[0]
+
+
+def measure_latency(engine: RecommendationPredictor, repeats: int = 200, batch_size: int = 64) -> Dict[str, float]:
+    """Median latency of a single prediction and of one batch, in milliseconds"""
+    age, height, weight, goals = sample_users(batch_size, engine.all_goals)
+    # Warm up lazy initialisation (allocators, thread pools) before timing
+    engine.predict_batch(age, height, weight, goals)
+    
+    single = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        engine.predict(age[i % batch_size], None, height[i % batch_size], weight[i % batch_size], goals[i % batch_size])
+        single.append((time.perf_counter() - started) * 1000.0)
+    
+    batch = []
+    for _ in range(max(repeats // 10, 1)):
+        started = time.perf_counter()
+        engine.predict_batch(age, height, weight, goals)
+        batch.append((time.perf_counter() - started) * 1000.0)
+    
+    return {
+        'single_p50_ms': round(float(np.median(single)), 4),
+        f'batch{batch_size}_p50_ms': round(float(np.median(batch)), 4),
+    }
@@ -0,0 +1,226 @@
+"""
+Hyperparameter sweep for the sauna recommendation model
+Trains every combination of hidden sizes, dropout, learning rate and batch size in a process
+pool (one torch thread per worker), measures each trial's latency once training is over, picks
+the lowest validation MAE whose single-prediction latency fits the budget, installs it as the
+serving model and exports it
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+SEARCH_SPACE = {
+    'hidden_sizes': [[64, 32], [128, 64, 32], [256, 128, 64]],
+    'dropout_rate': [0.1, 0.3],
+    'learning_rate': [1e-3, 3e-3],
+    'batch_size': [32, 128],
+}
+
+# Same split as train_model.py, so validation and test numbers are comparable with it
+TEST_SIZE = 0.2
+VALIDATION_SIZE = 0.1
+
+
+def sweep_configs(space: dict = SEARCH_SPACE) -> list:
+    """Every combination in the search space, as config dicts"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def _mae(engine, features, targets) -> list:
+    import numpy as np
+    errors = np.abs(engine._forward(features.astype(np.float32)) - targets)
+    return [float(value) for value in errors.mean(axis=0)]
+
+
+def run_trial(trial_id: int, config: dict, csv_path: str, trial_dir: str, epochs: int, patience: int,
+              fast: bool = True, seed: int = 42) -> dict:
+    """
+    Worker: train one config and evaluate its best checkpoint
+
+    Returns:
+        config plus validation / test MAE (temperature, humidity, session length), training
+        time, parameter count and serialized size; latency is measured later by measure_trials
+    """
+    import torch
+    from backend.predictive_model.neural_network import SaunaRecommendationEngine, serialized_size
+
+    # Workers already run in parallel; intra-op threads on top would only oversubscribe the cores
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+
+    model_path = os.path.join(trial_dir, f"trial_{trial_id}.pth")
+    scaler_path = os.path.join(trial_dir, f"trial_{trial_id}_scaler.pkl")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = SaunaRecommendationEngine(model_path=model_path, scaler_path=scaler_path)
+        started = time.perf_counter()
+        results = engine.train(
+            csv_path=csv_path,
+            epochs=epochs,
+            batch_size=config['batch_size'],
+            learning_rate=config['learning_rate'],
+            test_size=TEST_SIZE,
+            validation_size=VALIDATION_SIZE,
+            save_model=True,
+            fast=fast,
+            hidden_sizes=config['hidden_sizes'],
+            dropout_rate=config['dropout_rate'],
+            patience=patience
+        )
+        train_seconds = time.perf_counter() - started
+
+        # train() leaves the last epoch in memory; the saved checkpoint is the best one
+        best = SaunaRecommendationEngine(model_path=model_path, scaler_path=scaler_path, device='cpu', num_threads=1)
+        features, targets = best.prepare_features(best.load_data(csv_path))
+        _, X_val, X_test, _, y_val, y_test = best.split_data(features, targets, TEST_SIZE, VALIDATION_SIZE)
+        val_mae = _mae(best, X_val, y_val)
+        test_mae = _mae(best, X_test, y_test)
+
+    return {
+        'trial': trial_id,
+        **config,
+        'val_mae': val_mae,
+        'val_mae_mean': sum(val_mae) / len(val_mae),
+        'test_mae': test_mae,
+        'epochs': results['epochs'],
+        'train_seconds': train_seconds,
+        'parameters': sum(parameter.numel() for parameter in best.model.parameters()),
+        'model_bytes': serialized_size(best.model),
+        'model_path': model_path,
+        'scaler_path': scaler_path,
+    }
+
+
+def measure_trials(trials: list):
+    """
+    Add single / batch latency to every trial, one model at a time on one thread
+
+    Runs after the pool has finished, so no trial is timed while others are still training
+    """
+    import torch
+    from backend.predictive_model.neural_network import SaunaRecommendationEngine
+    from backend.predictive_model.runtimes import measure_latency
+
+    torch.set_num_threads(1)
+    for trial in trials:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = SaunaRecommendationEngine(model_path=trial['model_path'], scaler_path=trial['scaler_path'],
+                                               device='cpu', num_threads=1)
+        trial.update(measure_latency(engine))
+
+
+def select_best(trials: list, latency_budget_ms: float):
+    """Lowest mean validation MAE among trials whose single-prediction p50 fits the budget, or None"""
+    eligible = [trial for trial in trials if trial['single_p50_ms'] <= latency_budget_ms]
+    return min(eligible, key=lambda trial: trial['val_mae_mean']) if eligible else None
+
+
+def install_model(trial: dict, model_path: Path, scaler_path: Path):
+    """Copy a trial's checkpoint (model, scaler, encoders) over the serving model files"""
+    shutil.copyfile(trial['model_path'], model_path)
+    shutil.copyfile(trial['scaler_path'], scaler_path)
+    shutil.copyfile(trial['scaler_path'].replace('.pkl', '_encoders.pkl'),
+                    str(scaler_path).replace('.pkl', '_encoders.pkl'))
+
+
+def main():
+    """Run the sweep over the training CSV next to this script"""
+    from backend.predictive_model.export_model import export_all, print_parity
+    from backend.predictive_model.neural_network import SaunaRecommendationEngine
+
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for the sauna recommendation model.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel training processes.")
+    parser.add_argument("--epochs", type=int, default=200, help="Maximum epochs per trial.")
+    parser.add_argument("--patience", type=int, default=10, help="Early-stopping patience in epochs.")
+    parser.add_argument("--latency-budget-ms", type=float, default=1.0,
+                        help="Largest single-prediction p50 (one thread) a winner may have.")
+    parser.add_argument("--output", default="sweep_results.json", help="Where to write every trial's metrics.")
+    parser.add_argument("--loader", action="store_true", help="Train with the DataLoader loop instead of tensors.")
+    parser.add_argument("--no-export", action="store_true", help="Report only; leave the serving model alone.")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    csv_path = script_dir / "optimal_sauna_settings_with_height.csv"
+    if not csv_path.exists():
+        print(f"Error: CSV file not found at {csv_path}")
+        return 1
+
+    configs = sweep_configs()
+    print(f"Sweeping {len(configs)} configurations on {args.workers} workers...")
+
+    trials = []
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as trial_dir:
+        # spawn: forked workers would inherit the parent's torch thread pool state
+        with ProcessPoolExecutor(max_workers=args.workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(run_trial, trial_id, config, str(csv_path), trial_dir,
+                            args.epochs, args.patience, not args.loader): config
+                for trial_id, config in enumerate(configs)
+            }
+            for future in as_completed(futures):
+                try:
+                    trial = future.result()
+                except Exception as e:
+                    print(f"Trial {futures[future]} failed: {e}")
+                    continue
+                trials.append(trial)
+                print(f"  [{len(trials)}/{len(configs)}] hidden={trial['hidden_sizes']} "
+                      f"dropout={trial['dropout_rate']} lr={trial['learning_rate']} batch={trial['batch_size']}: "
+                      f"val MAE {trial['val_mae_mean']:.3f}, {trial['epochs']} epochs in {trial['train_seconds']:.1f}s")
+
+        print("\nMeasuring latency...")
+        measure_trials(trials)
+        best = select_best(trials, args.latency_budget_ms)
+
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                'latency_budget_ms': args.latency_budget_ms,
+                'elapsed_seconds': time.perf_counter() - started,
+                'best_trial': best['trial'] if best else None,
+                'trials': sorted(trials, key=lambda trial: trial['val_mae_mean']),
+            }, f, indent=2)
+        print(f"\nResults written to {args.output} ({time.perf_counter() - started:.1f}s)")
+
+        if best is None:
+            print(f"No trial met the {args.latency_budget_ms} ms latency budget")
+            return 1
+
+        print(f"\nBest (trial {best['trial']}): hidden={best['hidden_sizes']} dropout={best['dropout_rate']} "
+              f"lr={best['learning_rate']} batch={best['batch_size']}")
+        print(f"  - Validation MAE: {', '.join(f'{value:.3f}' for value in best['val_mae'])}")
+        print(f"  - Test MAE: {', '.join(f'{value:.3f}' for value in best['test_mae'])}")
+        print(f"  - Latency p50: {best['single_p50_ms']:.3f} ms, size {best['model_bytes'] / 1024:.1f} KiB")
+
+        if args.no_export:
+            return 0
+
+        model_path = script_dir / "sauna_recommendation_model.pth"
+        scaler_path = script_dir / "sauna_scaler.pkl"
+        install_model(best, model_path, scaler_path)
+
+    engine = SaunaRecommendationEngine(model_path=str(model_path), scaler_path=str(scaler_path))
+    reports = export_all(engine, script_dir)
+    for runtime, report in reports.items():
+        print_parity(runtime, report)
+    return 0 if all(report['passed'] for report in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
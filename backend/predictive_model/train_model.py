@@ -3,6 +3,7 @@ Training script for the Sauna Recommendation Neural Network
 Run this script to train the model on the optimal_sauna_settings_with_height.csv data
 """
 
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -11,10 +12,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.predictive_model.neural_network import SaunaRecommendationEngine
+from backend.predictive_model.export_model import export_all, print_parity
 
 
 def main():
     """Train the sauna recommendation model"""
+    parser = argparse.ArgumentParser(description="Train the sauna recommendation model.")
+    parser.add_argument("--fast", action="store_true",
+                        help="Train from in-memory tensors instead of a DataLoader (much faster on CPU).")
+    args = parser.parse_args()
     
     # Get the path to the CSV file
     script_dir = Path(__file__).parent
@@ -23,7 +29,7 @@ def main():
     if not csv_path.exists():
         print(f"Error: CSV file not found at {csv_path}")
         print("Please ensure optimal_sauna_settings_with_height.csv exists in the predictive_model directory")
-        return
+        return 1
     
     # Initialize the engine
     model_path = script_dir / "sauna_recommendation_model.pth"
@@ -46,7 +52,8 @@ def main():
         learning_rate=0.001,
         test_size=0.2,
         validation_size=0.1,
-        save_model=True
+        save_model=True,
+        fast=args.fast
     )
     
     print("\n" + "=" * 60)
@@ -59,6 +66,19 @@ def main():
     print(f"  - MAE Temperature: {results['mae_temp']:.2f}°C")
     print(f"  - MAE Humidity: {results['mae_humidity']:.2f}%")
     print(f"  - MAE Session Length: {results['mae_session']:.2f} minutes")
+    print(f"  - Epochs: {results['epochs']} ({results['epochs_per_sec']:.2f} epochs/sec)")
+    
+    # train() leaves the last epoch in memory; export (and test) the best checkpoint it saved
+    engine = SaunaRecommendationEngine(model_path=str(model_path), scaler_path=str(scaler_path))
+    
+    # Export the serving artifacts (NumPy with BatchNorm and scaler folded in, TorchScript, ONNX)
+    reports = export_all(engine, script_dir)
+    for runtime, report in reports.items():
+        print_parity(runtime, report)
+    failed = [runtime for runtime, report in reports.items() if not report['passed']]
+    if failed:
+        print(f"\nError: export failed the parity check for {', '.join(failed)}")
+        return 1
     
     # Test with a sample prediction
     print("\n" + "=" * 60)
@@ -77,8 +97,9 @@ def main():
     print(f"  - Temperature: {sample_prediction['temperature']}°C")
     print(f"  - Humidity: {sample_prediction['humidity']}%")
     print(f"  - Session Length: {sample_prediction['session_length']} minutes")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -9,10 +9,36 @@ load_dotenv()
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 MODEL_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_model.pth"
 SCALER_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_scaler.pkl"
+# Serving exports of the same model, written by predictive_model/export_model.py
+NUMPY_MODEL_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_model.npz"
+TORCHSCRIPT_MODEL_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_model.pt"
+ONNX_MODEL_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_model.onnx"
+MODEL_META_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_meta.json"
+GRID_MODEL_PATH = PROJECT_ROOT /  "predictive_model" / "sauna_recommendation_grid.npz"
+
+# Recommendation runtime: "torch", "torchscript", "onnx", "numpy", "grid" (interpolated lookup table,
+# built at startup if the file is missing), or "auto" (NumPy export if present, else torch)
+RECOMMENDATION_RUNTIME = os.getenv("RECOMMENDATION_RUNTIME", "auto").lower()
+# Intra-op threads for torch / ONNX Runtime inference; keep (workers x threads) <= cores. Unset keeps the library default
+RECOMMENDATION_THREADS = int(os.getenv("RECOMMENDATION_THREADS", "0")) or None
+# Multi-goal blending: the n-th selected goal (0-based) gets weight decay**n; 1.0 weighs all goals equally
+RECOMMENDATION_GOAL_ORDER_DECAY = float(os.getenv("RECOMMENDATION_GOAL_ORDER_DECAY", "1.0"))
+# Torch device for recommendations ("cpu", "cuda"); unset uses CUDA when available
+RECOMMENDATION_DEVICE = os.getenv("RECOMMENDATION_DEVICE") or None
+# Serve the torch runtime with int8 dynamically quantized Linear layers (CPU only; see quantize_model.py for its accuracy)
+RECOMMENDATION_QUANTIZE = os.getenv("RECOMMENDATION_QUANTIZE", "false").lower() == "true"
+
+# Recommendation micro-batching: concurrent /sauna/recommendations calls share one forward pass
+RECOMMENDATION_BATCHING = os.getenv("RECOMMENDATION_BATCHING", "true").lower() == "true"
+RECOMMENDATION_MAX_BATCH_SIZE = int(os.getenv("RECOMMENDATION_MAX_BATCH_SIZE", "64"))
+RECOMMENDATION_MAX_WAIT_MS = float(os.getenv("RECOMMENDATION_MAX_WAIT_MS", "2"))
 
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Shared secret for the /admin endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 # LLM Model Names (with safe fallbacks)
 try:
     from backend.LLM.config import model_name
@@ -1,7 +1,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.src.services.llm import initialize_llm_components
-from backend.src.services.recommendation import load_recommendation_model
+from backend.src.services.llm import initialize_llm_components, shutdown_llm_components
+from backend.src.services.recommendation import load_recommendation_model, shutdown_recommendation_model
 from backend.src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,4 +15,6 @@ async def lifespan(app: FastAPI):
     load_recommendation_model()
     initialize_llm_components()
     yield
-    logger.info("--- Application Shutdown ---")
\ No newline at end of file
+    logger.info("--- Application Shutdown ---")
+    shutdown_llm_components()
+    shutdown_recommendation_model()
\ No newline at end of file
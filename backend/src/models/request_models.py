@@ -22,6 +22,10 @@ class SaunaRecommendationRequest(BaseModel):
     weight: int
     goals: List[str]
 
+
+class SaunaBatchRecommendationRequest(BaseModel):
+    users: List[SaunaRecommendationRequest] = Field(..., min_length=1)
+
 #NOT USED
 class ChatMessageRequest(BaseModel):
     message: str
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -31,11 +31,20 @@ class StopSessionResponse(BaseModel):
     stopped_at: datetime
     duration_seconds: int
 
-class SaunaRecommendationResponse(BaseModel):
+class GoalSettings(BaseModel):
     temperature: float  # in Celsius
     humidity: float  # in percentage
     session_length: float  # in minutes
+
+class SaunaRecommendationResponse(BaseModel):
+    temperature: float  # in Celsius, blended over all selected goals
+    humidity: float  # in percentage
+    session_length: float  # in minutes
     goals_used: List[str]
+    per_goal: Dict[str, GoalSettings] = {}  # settings for each goal on its own, keyed by goal ID
+
+class SaunaBatchRecommendationResponse(BaseModel):
+    recommendations: List[SaunaRecommendationResponse]  # same order as the request's users
 
 #NOT USED
 class ChatMessageResponse(BaseModel):
@@ -2,8 +2,12 @@ from fastapi import APIRouter
 from .general import router as general_router
 from .sauna import router as sauna_router
 from .chat import router as chat_router
+from .socket import router as socket_router
+from .admin import router as admin_router
 
 api_router = APIRouter()
 api_router.include_router(general_router, tags=["General"])
 api_router.include_router(sauna_router, prefix="/sauna", tags=["Sauna"])
-api_router.include_router(chat_router, prefix="/chat", tags=["Chat"])
\ No newline at end of file
+api_router.include_router(chat_router, prefix="/chat", tags=["Chat"])
+api_router.include_router(socket_router, tags=["WebSocket"])
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
\ No newline at end of file
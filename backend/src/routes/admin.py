@@ -0,0 +1,49 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from starlette import status
+
+from backend.src.core.config import ADMIN_TOKEN
+from backend.src.services.llm import get_llm_components
+from backend.src.utils.logger import get_logger
+
+router = APIRouter()
+logger = get_logger('admin')
+
+
+def _check_token(token):
+    # Admin routes are off unless a token is configured
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled.")
+    if not secrets.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token.")
+
+
+def _index_manager():
+    index_manager = get_llm_components().get("index_manager")
+    if index_manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chat service unavailable. FAISS index not loaded."
+        )
+    return index_manager
+
+
+@router.get("/index")
+async def index_status(x_admin_token: Optional[str] = Header(None)):
+    """Active index version, in-flight requests and the state of the last reload"""
+    _check_token(x_admin_token)
+    return _index_manager().describe()
+
+
+@router.post("/index/reload", status_code=status.HTTP_202_ACCEPTED)
+async def reload_index(x_admin_token: Optional[str] = Header(None)):
+    """Load the index from disk in the background and swap it in once ready"""
+    _check_token(x_admin_token)
+    index_manager = _index_manager()
+    if not index_manager.start_reload():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="An index reload is already running.")
+    active = index_manager.active
+    logger.info(f"Index reload started (active version: {getattr(active, 'version', None)})")
+    return {"status": "loading", "active_version": getattr(active, "version", None)}
@@ -3,6 +3,7 @@ import json
 import uuid
 from fastapi import APIRouter, Request, HTTPException
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse, StreamingResponse
 
 from backend.LLM.qa import chat, clear_session, get_session_history
@@ -13,20 +14,21 @@ from backend.src.utils.logger import get_logger
 router = APIRouter()
 logger = get_logger('chat')
 
-faiss_index = None
-qa_chain = None
-qa_chain_streaming = None
+answer_cache = None
+request_coalescer = None
+index_manager = None
 
 def _load_components():
-    global faiss_index, qa_chain, qa_chain_streaming
+    global answer_cache, request_coalescer, index_manager
     try:
         components = get_llm_components()
-        faiss_index = components.get("faiss_index")
-        qa_chain = components.get("qa_chain")
-        qa_chain_streaming = components.get("qa_chain_streaming")
+        answer_cache = components.get("answer_cache")
+        request_coalescer = components.get("request_coalescer")
+        index_manager = components.get("index_manager")
+        active = index_manager.active if index_manager is not None else None
         logger.info(
-            f"LLM components loaded (faiss_index is None? {faiss_index is None}, "
-            f"faiss_size={getattr(faiss_index, 'ntotal', 'n/a')})"
+            f"LLM components loaded (index version: {getattr(active, 'version', None)}, "
+            f"faiss_size={getattr(getattr(active, 'faiss_index', None), 'ntotal', 'n/a')})"
         )
     except Exception as e:
         logger.error(f"Error loading LLM components: {e}", exc_info=True)
@@ -35,8 +37,9 @@ def _load_components():
 _load_components()
 
 def _ensure_components():
-    # Lazy reload if something came up None (e.g. due to import order with reloader)
-    if faiss_index is None or qa_chain is None or qa_chain_streaming is None:
+    # Lazy reload if something came up None (e.g. due to import order with reloader).
+    # Index and chains are not cached here: each request pins the manager's active version.
+    if index_manager is None:
         logger.warning("Components missing; attempting reload.")
         _load_components()
 
@@ -44,14 +47,19 @@ def _ensure_components():
 async def ask_endpoint(request: QuestionRequest):
     _ensure_components()
 
-    if faiss_index is None:
+    if index_manager is None:
         logger.error("FAISS index is not loaded (None).")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Chat service unavailable. FAISS index not loaded."
         )
 
-    if qa_chain is None:
+    with index_manager.acquire() as version:
+        return await _answer(request, version)
+
+
+async def _answer(request: QuestionRequest, version):
+    if version is None or version.qa_chain is None:
         logger.error("QA chain is not initialized (None).")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -59,14 +67,19 @@ async def ask_endpoint(request: QuestionRequest):
         )
 
     # Optional: allow empty index but warn
-    if getattr(faiss_index, "ntotal", 1) == 0:
+    if getattr(version.faiss_index, "ntotal", 1) == 0:
         logger.warning("FAISS index loaded but empty (ntotal=0). Proceeding with fallback responses.")
 
     session_id = request.session_id or str(uuid.uuid4())
     logger.info(f"Processing question for session_id={session_id}")
 
     try:
-        response = chat(qa_chain, request.question, session_id=session_id)
+        # Run off the event loop so concurrent requests can overlap (and be coalesced)
+        response = await run_in_threadpool(
+            chat, version.qa_chain, request.question,
+            session_id=session_id, answer_cache=answer_cache, coalescer=request_coalescer,
+            index_version=version.version
+        )
         if response is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -83,3 +96,16 @@ async def ask_endpoint(request: QuestionRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error processing question"
         )
+
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Answer cache, query embedding cache and request coalescing statistics"""
+    _ensure_components()
+    active = index_manager.active if index_manager is not None else None
+    embeddings = getattr(getattr(active, "faiss_index", None), "embeddings", None)
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "embedding_cache": embeddings.stats() if hasattr(embeddings, "stats") else None,
+        "request_coalescing": request_coalescer.stats() if request_coalescer is not None else None
+    }
@@ -1,15 +1,19 @@
+import asyncio
 import time
 
 import numpy as np
 from fastapi import APIRouter, Request
+from starlette.concurrency import run_in_threadpool
 import matplotlib.pyplot as plt
 
 from backend.bridge.bridge import send_to_ts
 from backend.src.core.client import client, device
 from backend.src.models.error_models import generic_fail
-from backend.src.models.request_models import StartSessionRequest, StopSessionRequest, SaunaRecommendationRequest
-from backend.src.models.response_models import StartSessionResponse, StopSessionResponse, SaunaRecommendationResponse
-from backend.src.services.recommendation import get_sauna_engine
+from backend.src.models.request_models import StartSessionRequest, StopSessionRequest, SaunaRecommendationRequest, \
+    SaunaBatchRecommendationRequest
+from backend.src.models.response_models import StartSessionResponse, StopSessionResponse, SaunaRecommendationResponse, \
+    SaunaBatchRecommendationResponse
+from backend.src.services.recommendation import get_sauna_engine, get_recommendation_batcher
 from backend.src.utils.logger import get_logger
 from datetime import datetime
 device_online = True
@@ -25,7 +29,7 @@ router = APIRouter()
 # from your code: SaunaRecommendationResponse
 
 @router.post("/recommendations", response_model=SaunaRecommendationResponse)
-def post_sauna_recommendations(request: SaunaRecommendationRequest):
+async def post_sauna_recommendations(request: SaunaRecommendationRequest):
     age = request.age
     gender = request.gender
     height = request.height
@@ -50,22 +54,28 @@ def post_sauna_recommendations(request: SaunaRecommendationRequest):
 
 
     try:
-        # Get recommendations from neural network
-        recommendation = sauna_engine.predict(
-            age=float(age),
-            gender=gender,
-            height=float(height),
-            weight=float(weight),
-            selected_goals=goals
-        )
-
-
+        # Get recommendations from neural network; with batching, concurrent requests share a forward pass
+        batcher = get_recommendation_batcher()
+        if batcher is not None:
+            recommendation = await asyncio.wrap_future(
+                batcher.submit((float(age), float(height), float(weight), goals))
+            )
+        else:
+            recommendation = await run_in_threadpool(
+                sauna_engine.predict,
+                age=float(age),
+                gender=gender,
+                height=float(height),
+                weight=float(weight),
+                selected_goals=goals
+            )
 
         return SaunaRecommendationResponse(
             temperature=recommendation['temperature'],
             humidity=recommendation['humidity'],
             session_length=recommendation['session_length'],
-            goals_used=goals
+            goals_used=list(recommendation['per_goal']),
+            per_goal=recommendation['per_goal']
         )
     except Exception as e:
         logger.error(f"Error generating recommendations: {e}")
@@ -74,6 +84,47 @@ def post_sauna_recommendations(request: SaunaRecommendationRequest):
         )
 
 
+@router.post("/recommendations/batch", response_model=SaunaBatchRecommendationResponse)
+def post_sauna_recommendations_batch(request: SaunaBatchRecommendationRequest):
+    """
+    Get sauna settings recommendations for many users in one forward pass.
+    Recommendations are returned in the same order as the users.
+    """
+    sauna_engine = get_sauna_engine()
+    if sauna_engine is None:
+        raise generic_fail("Sauna recommendation engine is not initialized.")
+
+    users = request.users
+    age = np.array([user.age for user in users], dtype=np.float64)
+    height = np.array([user.height for user in users], dtype=np.float64)
+    weight = np.array([user.weight for user in users], dtype=np.float64)
+    goals = [user.goals for user in users]
+
+    # Ensure height is in meters (convert from cm if needed)
+    height = np.where(height > 3, height / 100, height)
+
+    try:
+        predictions = sauna_engine.predict_batch(age, height, weight, goals, per_goal=True)
+        return SaunaBatchRecommendationResponse(recommendations=[
+            SaunaRecommendationResponse(
+                temperature=float(temperature),
+                humidity=float(humidity),
+                session_length=float(session_length),
+                goals_used=list(per_goal),
+                per_goal=per_goal
+            )
+            for temperature, humidity, session_length, per_goal in zip(
+                predictions['temperature'], predictions['humidity'], predictions['session_length'],
+                predictions['per_goal']
+            )
+        ])
+    except Exception as e:
+        logger.error(f"Error generating batch recommendations: {e}")
+        raise generic_fail(
+            detail=f"Error generating recommendations: {str(e)}"
+        )
+
+
 @router.post("/start_session")
 def post_start_session(request: StartSessionRequest):
     from backend.brief.qa_brief  import provide_brief, brief_setup
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Request, HTTPException
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from backend.LLM.qa import chat_stream
-from backend.src.services.llm import faiss_index, qa_chain_streaming
+from backend.src.services.llm import get_llm_components
 from backend.src.utils.logger import get_logger
 
 router = APIRouter()
@@ -29,7 +29,9 @@ async def websocket_echo(ws: WebSocket):
 async def websocket_chat(ws: WebSocket):
     await ws.accept()
 
-    if not faiss_index or not qa_chain_streaming:
+    # Read at connection time; importing the globals would capture their pre-startup None values
+    index_manager = get_llm_components().get("index_manager")
+    if index_manager is None or index_manager.active is None:
         await ws.send_json({
             "type": "error",
             "content": "Chat service is initializing. Please try again shortly."
@@ -67,16 +69,18 @@ async def websocket_chat(ws: WebSocket):
                 "session_id": session_id
             })
 
-            async for chunk in chat_stream(
-                qa_chain_streaming,
-                question,
-                session_id=session_id
-            ):
-                try:
-                    await ws.send_json(chunk)
-                except Exception as send_err:
-                    logger.error(f"Error sending chunk over WebSocket: {send_err}", exc_info=True)
-                    break
+            # Each answer pins the index version that is active when it starts
+            with index_manager.acquire() as version:
+                async for chunk in chat_stream(
+                    version.qa_chain_streaming,
+                    question,
+                    session_id=session_id
+                ):
+                    try:
+                        await ws.send_json(chunk)
+                    except Exception as send_err:
+                        logger.error(f"Error sending chunk over WebSocket: {send_err}", exc_info=True)
+                        break
 
     except WebSocketDisconnect:
         logger.info("Chat WebSocket client disconnected")
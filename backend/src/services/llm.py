@@ -1,14 +1,22 @@
-from backend.src.core.config import OPENAI_API_KEY, LLM_MODEL_NAME
+from backend.src.core.config import LLM_MODEL_NAME
 from backend.src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 faiss_index = None
 qa_chain = None
 qa_chain_streaming = None
+answer_cache = None
+request_coalescer = None
+index_manager = None
 
 try:
-    from backend.LLM.faiss_indexing import load_faiss_index
+    from backend.LLM.components import get_shared_components
     from backend.LLM.qa import create_qa_chain
+    from backend.LLM.llm_provider import provider_available
+    from backend.LLM.answer_cache import SemanticAnswerCache
+    from backend.LLM.single_flight import SingleFlight
+    from backend.LLM.index_manager import IndexManager
+    from backend.LLM.config import ANSWER_CACHE_ENABLED, COALESCE_REQUESTS
 
     LLM_AVAILABLE = True
 except ImportError as e:
@@ -19,37 +27,78 @@ def get_llm_components():
     return {
         "faiss_index": faiss_index,
         "qa_chain": qa_chain,
-        "qa_chain_streaming": qa_chain_streaming
+        "qa_chain_streaming": qa_chain_streaming,
+        "answer_cache": answer_cache,
+        "request_coalescer": request_coalescer,
+        "index_manager": index_manager
     }
 
+def _create_chains(components):
+    """Both chains share one embedding model, index and retriever"""
+    retriever = components.retriever
+    return (
+        create_qa_chain(components.faiss_index, model_name=LLM_MODEL_NAME, retriever=retriever),
+        create_qa_chain(components.faiss_index, model_name=LLM_MODEL_NAME, streaming=True, retriever=retriever),
+    )
+
+
+def _on_index_swap(version):
+    """Keep the module globals pointing at the active index version"""
+    global faiss_index, qa_chain, qa_chain_streaming
+    faiss_index = version.faiss_index
+    qa_chain = version.qa_chain
+    qa_chain_streaming = version.qa_chain_streaming
+    # Answers cached against the old corpus may no longer be what the new one would say. Cache
+    # entries carry their index version, so answers stored later by requests still draining on
+    # the old version are never served; clearing just frees the old entries now
+    if answer_cache is not None:
+        answer_cache.clear()
+
+
 def initialize_llm_components():
     """Initializes the FAISS index and QA chains."""
-    global faiss_index, qa_chain, qa_chain_streaming
+    global answer_cache, request_coalescer, index_manager
 
     if not LLM_AVAILABLE:
         logger.error("LLM components are not available. Chat functionality will be disabled.")
         return
 
-    if not OPENAI_API_KEY:
-        logger.error("OPENAI_API_KEY not found. Chat functionality will be disabled.")
+    if not provider_available():
+        logger.error("OPENAI_API_KEY not found and no fallback LLM provider set. Chat functionality will be disabled.")
         return
 
     logger.info("Loading FAISS index...")
-    faiss_index = load_faiss_index()
-    if faiss_index is None:
+    components = get_shared_components()
+    if components.faiss_index is None:
         logger.error("Failed to load FAISS index. Chat functionality disabled.")
         return
 
     logger.info("Creating QA chains...")
-    qa_chain = create_qa_chain(faiss_index, model_name=LLM_MODEL_NAME)
-    qa_chain_streaming = create_qa_chain(faiss_index, model_name=LLM_MODEL_NAME, streaming=True)
+    manager = IndexManager(_create_chains, index_path=components.index_path, on_swap=_on_index_swap)
+    try:
+        manager.load(components)
+    except RuntimeError as e:
+        logger.error(f"Failed to create one or more QA chains: {e}")
+        return
+    index_manager = manager
+
+    if ANSWER_CACHE_ENABLED:
+        answer_cache = SemanticAnswerCache(components.embedding_model)
+        logger.info("Semantic answer cache enabled.")
 
-    if qa_chain and qa_chain_streaming:
-        logger.info("LLM components initialized successfully.")
-    else:
-        logger.error("Failed to create one or more QA chains.")
+    if COALESCE_REQUESTS:
+        request_coalescer = SingleFlight()
+
+    logger.info("LLM components initialized successfully.")
 
 
 def get_qa_chains():
     """Returns the loaded QA chains."""
-    return qa_chain, qa_chain_streaming
\ No newline at end of file
+    return qa_chain, qa_chain_streaming
+
+
+def shutdown_llm_components():
+    """Persists the query embedding cache, if one is configured."""
+    if faiss_index is None:
+        return
+    get_shared_components().embedding_model.save()
@@ -1,32 +1,154 @@
-from backend.src.core.config import MODEL_PATH, SCALER_PATH
+from backend.predictive_model.micro_batcher import MicroBatcher
+from backend.predictive_model.runtimes import measure_latency
+from backend.src.core.config import (
+    MODEL_PATH, SCALER_PATH, NUMPY_MODEL_PATH, TORCHSCRIPT_MODEL_PATH, ONNX_MODEL_PATH, MODEL_META_PATH,
+    GRID_MODEL_PATH, RECOMMENDATION_RUNTIME, RECOMMENDATION_THREADS, RECOMMENDATION_DEVICE,
+    RECOMMENDATION_QUANTIZE, RECOMMENDATION_GOAL_ORDER_DECAY,
+    RECOMMENDATION_BATCHING, RECOMMENDATION_MAX_BATCH_SIZE, RECOMMENDATION_MAX_WAIT_MS
+)
 from backend.src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 sauna_engine = None
+recommendation_batcher = None
+recommendation_runtime = None
 
-try:
+def _predict_many(requests):
+    """Micro-batch function: [(age, height, weight, goals)] -> [recommendation dict]"""
+    age, height, weight, goals = zip(*requests)
+    predictions = sauna_engine.predict_batch(age, height, weight, list(goals), per_goal=True)
+    return [
+        {
+            "temperature": float(predictions["temperature"][i]),
+            "humidity": float(predictions["humidity"][i]),
+            "session_length": float(predictions["session_length"][i]),
+            "per_goal": predictions["per_goal"][i],
+        }
+        for i in range(len(requests))
+    ]
+
+def _require(*paths):
+    missing = [str(path) for path in paths if not path.exists()]
+    if missing:
+        raise FileNotFoundError(f"Missing model files: {', '.join(missing)}")
+
+def _is_stale(path):
+    """True when an exported artifact predates the torch checkpoint it was exported from."""
+    return MODEL_PATH.exists() and path.exists() and MODEL_PATH.stat().st_mtime > path.stat().st_mtime
+
+def _require_fresh(*paths):
+    """Like _require, but an artifact older than the torch model counts as missing."""
+    _require(*paths)
+    stale = [path.name for path in paths if _is_stale(path)]
+    if stale:
+        raise FileNotFoundError(f"Stale model files (older than {MODEL_PATH.name}; re-run export_model.py): {', '.join(stale)}")
+
+def _load_torch_engine():
+    _require(MODEL_PATH, SCALER_PATH)
     from backend.predictive_model.neural_network import SaunaRecommendationEngine
-    NEURAL_NETWORK_AVAILABLE = True
-except ImportError as e:
-    logger.warning("Neural network not available: %s", e)
-    NEURAL_NETWORK_AVAILABLE = False
+    return SaunaRecommendationEngine(
+        model_path=str(MODEL_PATH),
+        scaler_path=str(SCALER_PATH),
+        device=RECOMMENDATION_DEVICE,
+        num_threads=RECOMMENDATION_THREADS,
+        quantize=RECOMMENDATION_QUANTIZE
+    )
+
+def _load_engine(runtime):
+    """Loads the engine for one runtime; raises if its artifacts or packages are missing."""
+    if runtime == "torch":
+        return _load_torch_engine()
+    if runtime == "numpy":
+        _require_fresh(NUMPY_MODEL_PATH)
+        from backend.predictive_model.numpy_inference import NumpyRecommendationEngine
+        return NumpyRecommendationEngine(str(NUMPY_MODEL_PATH))
+    if runtime == "torchscript":
+        _require_fresh(TORCHSCRIPT_MODEL_PATH, MODEL_META_PATH)
+        from backend.predictive_model.runtimes import TorchScriptRecommendationEngine
+        return TorchScriptRecommendationEngine(
+            str(TORCHSCRIPT_MODEL_PATH), str(MODEL_META_PATH), num_threads=RECOMMENDATION_THREADS
+        )
+    if runtime == "onnx":
+        _require_fresh(ONNX_MODEL_PATH, MODEL_META_PATH)
+        from backend.predictive_model.runtimes import OnnxRecommendationEngine
+        return OnnxRecommendationEngine(str(ONNX_MODEL_PATH), str(MODEL_META_PATH), num_threads=RECOMMENDATION_THREADS)
+    if runtime == "grid":
+        from backend.predictive_model.lookup_grid import RecommendationGrid
+        if GRID_MODEL_PATH.exists() and not _is_stale(GRID_MODEL_PATH):
+            return RecommendationGrid(str(GRID_MODEL_PATH))
+        if GRID_MODEL_PATH.exists():
+            logger.warning("Recommendation grid is older than %s; rebuilding it at startup.", MODEL_PATH.name)
+        engine = _load_engine(_auto_runtime())
+        grid = RecommendationGrid.build(engine)
+        logger.info("Recommendation grid built at startup; error vs network: %s", grid.error_report(engine))
+        return grid
+    raise ValueError(f"Unknown recommendation runtime '{runtime}'")
+
+def _auto_runtime():
+    """NumPy export when present and not older than the torch model (it avoids importing torch), else torch.
+    Quantization is a torch-only load option, so requesting it selects torch."""
+    if RECOMMENDATION_QUANTIZE:
+        return "torch"
+    if NUMPY_MODEL_PATH.exists():
+        if _is_stale(NUMPY_MODEL_PATH):
+            logger.warning("NumPy model is older than %s; re-run export_model.py. Using torch.", MODEL_PATH.name)
+        else:
+            return "numpy"
+    return "torch"
 
 def load_recommendation_model():
     """Loads the sauna recommendation model into memory."""
-    global sauna_engine
-    if NEURAL_NETWORK_AVAILABLE and sauna_engine is None:
+    global sauna_engine, recommendation_batcher, recommendation_runtime
+    if sauna_engine is None:
+        runtime = _auto_runtime() if RECOMMENDATION_RUNTIME == "auto" else RECOMMENDATION_RUNTIME
+        if RECOMMENDATION_QUANTIZE and runtime != "torch":
+            logger.warning("RECOMMENDATION_QUANTIZE only applies to the torch runtime; ignored for '%s'.", runtime)
         try:
-            if MODEL_PATH.exists() and SCALER_PATH.exists():
-                sauna_engine = SaunaRecommendationEngine(
-                    model_path=str(MODEL_PATH),
-                    scaler_path=str(SCALER_PATH)
+            try:
+                sauna_engine = _load_engine(runtime)
+            except (FileNotFoundError, ImportError) as e:
+                if runtime == "torch":
+                    raise
+                logger.warning("Recommendation runtime '%s' unavailable (%s); falling back to torch.", runtime, e)
+                runtime = "torch"
+                sauna_engine = _load_engine(runtime)
+            sauna_engine.goal_order_decay = RECOMMENDATION_GOAL_ORDER_DECAY
+            recommendation_runtime = {"runtime": runtime, **measure_latency(sauna_engine)}
+            logger.info(
+                "Sauna recommendation model loaded successfully (runtime=%s, single=%.3fms, batch64=%.3fms).",
+                runtime, recommendation_runtime["single_p50_ms"], recommendation_runtime["batch64_p50_ms"]
+            )
+            if RECOMMENDATION_BATCHING:
+                recommendation_batcher = MicroBatcher(
+                    _predict_many,
+                    max_batch_size=RECOMMENDATION_MAX_BATCH_SIZE,
+                    max_wait_ms=RECOMMENDATION_MAX_WAIT_MS,
+                    name="recommendation-batcher"
+                )
+                logger.info(
+                    "Recommendation micro-batching enabled (max_batch_size=%d, max_wait_ms=%.1f).",
+                    RECOMMENDATION_MAX_BATCH_SIZE, RECOMMENDATION_MAX_WAIT_MS
                 )
-                logger.info("Sauna recommendation model loaded successfully.")
-            else:
-                logger.warning("Model or scaler files not found. Recommendation engine disabled.")
+        except FileNotFoundError as e:
+            logger.warning("Model or scaler files not found (%s). Recommendation engine disabled.", e)
         except Exception as e:
             logger.error("Failed to load sauna recommendation model: %s", e)
 
 def get_sauna_engine():
     """Returns the loaded sauna engine instance."""
-    return sauna_engine
\ No newline at end of file
+    return sauna_engine
+
+def get_recommendation_runtime():
+    """Returns the selected runtime and its startup latency probe."""
+    return recommendation_runtime
+
+def get_recommendation_batcher():
+    """Returns the recommendation micro-batcher, or None if batching is disabled."""
+    return recommendation_batcher
+
+def shutdown_recommendation_model():
+    """Stops the micro-batcher worker after it drains queued requests."""
+    global recommendation_batcher
+    if recommendation_batcher is not None:
+        recommendation_batcher.close()
+        recommendation_batcher = None